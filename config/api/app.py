@@ -0,0 +1,17 @@
+import logging
+import os
+settings_file = "config.api.settings"
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_file)
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+
+# Warm up in each worker process, after any fork: don't preload this module
+# in a forking server, or its workers would share the connections.
+from django.conf import settings
+if settings.WARM_UP_ON_START:
+    from scotus import warmup
+    logger = logging.getLogger('scotus.warmup')
+    try:
+        logger.info("warm up %s", warmup.warm_up())
+    except Exception:
+        logger.exception("warm up failed; serving cold")
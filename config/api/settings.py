@@ -0,0 +1,21 @@
+from config.prod.settings import *
+
+# The API on its own: config.prod without the admin, HTML pages, sessions,
+# auth, messages or CSRF, none of which the JSON / CSV endpoints use.
+INSTALLED_APPS = [
+    'django.contrib.contenttypes',
+    'scotus'
+]
+
+MIDDLEWARE_CLASSES = [
+    'django.middleware.security.SecurityMiddleware',
+    'django.middleware.common.CommonMiddleware',
+]
+
+TEMPLATES = [
+    dict(TEMPLATES[0], OPTIONS=dict(TEMPLATES[0]['OPTIONS'], context_processors=[])),
+]
+
+ROOT_URLCONF = 'scotus.api_urls'
+
+WSGI_APPLICATION = 'config.api.app.application'
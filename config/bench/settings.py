@@ -0,0 +1,27 @@
+import os
+
+from config.dev.settings import *
+
+# Settings for `generate_fixtures` and `benchmark`: a throwaway SQLite
+# database by default, or a local PostgreSQL one with PYSCOTUS_BENCH_DB_NAME.
+DEBUG = False
+
+ALLOWED_HOSTS = ALLOWED_HOSTS + ['testserver']
+
+if os.environ.get('PYSCOTUS_BENCH_DB_NAME', None):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql_psycopg2',
+            'NAME': os.environ.get('PYSCOTUS_BENCH_DB_NAME'),
+            'USER': os.environ.get('PYSCOTUS_DB_USER', ''),
+            'PASSWORD': os.environ.get('PYSCOTUS_DB_PASSWORD', ''),
+            'HOST': os.environ.get('PYSCOTUS_DB_HOST', ''),
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('PYSCOTUS_BENCH_SQLITE', os.path.join(os.path.dirname(BASE_DIR), 'bench.sqlite3')),
+        }
+    }
@@ -0,0 +1,68 @@
+import os
+
+from config.dev.settings import *
+
+# Production: no DEBUG (which keeps every query in connection.queries),
+# cached templates, ujson rendering, persistent connections, PgBouncer-safe
+# cursors and a warm-up before serving. The database engine can be swapped
+# for a pooling backend.
+DEBUG = False
+
+SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+
+ALLOWED_HOSTS = os.environ.get('PYSCOTUS_ALLOWED_HOSTS', 'localhost').split(',')
+
+WSGI_APPLICATION = 'config.prod.app.application'
+
+# Compile each template once per process.
+TEMPLATES = [
+    dict(TEMPLATES[0], APP_DIRS=False, OPTIONS=dict(TEMPLATES[0]['OPTIONS'], loaders=[
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ])),
+]
+
+DATABASES = {
+    'default': {
+        # Set PYSCOTUS_DB_ENGINE to a pooling backend, e.g.,
+        # django_postgrespool2, to pool connections inside each process.
+        'ENGINE': os.environ.get('PYSCOTUS_DB_ENGINE', 'django.db.backends.postgresql_psycopg2'),
+        'NAME': os.environ.get('PYSCOTUS_DB_NAME', 'nyt_scotus'),
+        'USER': os.environ.get('PYSCOTUS_DB_USER', 'nyt_scotus'),
+        'PASSWORD': os.environ.get('PYSCOTUS_DB_PASSWORD', ''),
+        'HOST': os.environ.get('PYSCOTUS_DB_HOST', ''),
+        'PORT': os.environ.get('PYSCOTUS_DB_PORT', ''),
+        # Keep connections open between requests; Django closes them when
+        # they get older than this or after a database error.
+        'CONN_MAX_AGE': int(os.environ.get('PYSCOTUS_DB_CONN_MAX_AGE', 600)),
+        # Behind PgBouncer in transaction pooling mode, server-side cursors
+        # (used by .iterator()) don't survive between transactions.
+        'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('PYSCOTUS_PGBOUNCER', '') != '',
+        'OPTIONS': {
+            'connect_timeout': int(os.environ.get('PYSCOTUS_DB_CONNECT_TIMEOUT', 5)),
+        },
+    }
+}
+
+# Cached and materialized API responses live here, so every worker process
+# (and config.api, which inherits this) sees the same entries and the purges
+# the loaders send. The file-based cache is shared by the processes of one
+# host; point PYSCOTUS_CACHE_BACKEND at, e.g., django_redis.cache.RedisCache
+# to share it between hosts. Purges never reach a process-local cache, so
+# scotus.responses only keeps entries there for a few minutes.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'PYSCOTUS_CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('PYSCOTUS_CACHE_LOCATION', '/var/tmp/pyscotus_cache'),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('PYSCOTUS_CACHE_MAX_ENTRIES', 10000)),
+        },
+    }
+}
+
+WARM_UP_ON_START = True
+
+FAST_JSON = True
@@ -13,3 +13,68 @@ ACTIVE_JUSTICES = [
     {"justice": 114, "justicename": "EKagan", "full_name": "Kagan, Elena", "start_date": "08/07/2010"},
     {"justice": 115, "justicename": "NMGorsuch", "full_name": "Gorsuch, Neil", "start_date": "04/08/2017"},
 ]
+
+# Justices whose votes on the winning side of 5-4 decisions are broken out
+# in /api/v1/case/by-term/, as "<label> share -5" / "<label> share 5" columns.
+SWING_JUSTICES = [
+    {"justicename": "AMKennedy", "label": "kennedy"},
+    {"justicename": "LFPowell", "label": "powell"},
+]
+
+# Cache alias (see CACHES) for the materialized Martin-Quinn score responses.
+MATERIALIZED_RESPONSE_CACHE = 'default'
+
+# Cache alias (see CACHES) for the vote matrix generation, which every
+# process checks to know when to rebuild its in-memory vote matrix.
+VOTE_MATRIX_CACHE = 'default'
+
+# Cache alias (see CACHES) for the other cached API responses, and how many
+# seconds responses touching the current term or natural court are kept.
+# Responses about past terms are kept until purged.
+RESPONSE_CACHE = 'default'
+RESPONSE_CACHE_CURRENT_TIMEOUT = 300
+
+# /api/v1/case/filter/ only filters and orders on indexed Case fields.
+# Fields declared with db_index are allowed automatically; list any other
+# Case field here once the database has an index on it.
+FILTER_API_INDEXED_FIELDS = ('term',)
+
+# The most rows /api/v1/case/filter/ returns per page, and the most values
+# a single __in filter may list.
+FILTER_API_MAX_ROWS = 10000
+FILTER_API_MAX_IN_VALUES = 100
+
+# Reject /api/v1/case/filter/ queries PostgreSQL estimates above this cost.
+# None skips the check, which saves an EXPLAIN per request.
+FILTER_API_MAX_COST = None
+
+# Sizes of the process-local Justice and Case identity maps.
+JUSTICE_CACHE_SIZE = 256
+CASE_CACHE_SIZE = 20000
+
+# Admin changelists of tables with at least this many rows (per PostgreSQL's
+# estimate) show an estimated count instead of running COUNT(*).
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 10000
+
+# Read the vote matrix from the typed votes_typed shadow table rather than
+# votes. Build it first with `django-admin build_typed_votes`.
+TYPED_VOTES = False
+
+# Requests per API URL name that /api/v1/_stats/ computes percentiles over.
+INSTRUMENTATION_WINDOW = 1000
+
+# Threads (each with its own database connection) that multi-query API views
+# run their independent queries on. Below 2 runs them one after another.
+QUERY_FANOUT_WORKERS = 4
+
+# Whether the WSGI app opens its connections and primes the identity maps
+# and vote matrix before serving, and how many recent terms of cases to load.
+WARM_UP_ON_START = False
+WARM_UP_CASE_TERMS = 5
+
+# Render API JSON with ujson: same data, compact separators, much faster.
+FAST_JSON = False
+
+# Seconds a process trusts its cached list of a table's columns, e.g.,
+# whether ValidCasesManager can filter on is_valid yet.
+TABLE_COLUMNS_TIMEOUT = 60
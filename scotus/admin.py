@@ -1,15 +1,115 @@
+from django.conf import settings
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils.functional import cached_property
 
 from scotus import models
+from scotus import utils
+
+# The first term the app has data for.
+FIRST_TERM = 1946
+
+# SCDB decisionDirection codes.
+DECISION_DIRECTIONS = (('1', 'conservative'), ('2', 'liberal'), ('3', 'unspecifiable'))
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginates an unfiltered changelist of a large table using PostgreSQL's
+    row estimate (pg_class.reltuples) instead of an exact COUNT(*).
+    Filtered changelists and small tables still get an exact count.
+    """
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if connection.vendor == 'postgresql' and query is not None and not query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples FROM pg_class WHERE relname = %s",
+                    [self.object_list.model._meta.db_table])
+                row = cursor.fetchone()
+            if row and row[0] >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return int(row[0])
+        return super(EstimatedCountPaginator, self).count
+
+
+class ColumnFilter(admin.SimpleListFilter):
+    """
+    A list filter on one column. Subclasses' lookups() come from fixed
+    codes or a small table, never the SELECT DISTINCT over the whole table
+    being filtered that a plain list_filter on a CharField runs.
+    """
+    def queryset(self, request, queryset):
+        if self.value() is None:
+            return queryset
+        return queryset.filter(**{self.parameter_name: self.value()})
+
+
+class TermFilter(ColumnFilter):
+    title = 'term'
+    parameter_name = 'term'
+
+    def lookups(self, request, model_admin):
+        terms = range(int(utils.current_term()), FIRST_TERM - 1, -1)
+        return [("%s" % t, "%s" % t) for t in terms]
+
+
+class NaturalCourtFilter(ColumnFilter):
+    title = 'natural court'
+    parameter_name = 'naturalcourt'
+
+    def lookups(self, request, model_admin):
+        courts = models.NaturalCourt.objects.order_by('-naturalcourt')
+        return [("%s" % c.naturalcourt, c.common_name()) for c in courts]
+
+
+class DecisionDirectionFilter(ColumnFilter):
+    title = 'decision direction'
+    parameter_name = 'decisiondirection'
+
+    def lookups(self, request, model_admin):
+        return DECISION_DIRECTIONS
+
+
+class JusticeNameFilter(ColumnFilter):
+    title = 'justice'
+    parameter_name = 'justicename'
+
+    def lookups(self, request, model_admin):
+        names = models.Justice.objects.exclude(justicename=None)\
+            .order_by('justicename').values_list('justicename', flat=True)
+        return [(n, n) for n in names]
+
+
+class ScotusModelAdmin(admin.ModelAdmin):
+    """
+    Changelist defaults for the big SCDB tables: estimated counts,
+    no second full-table count when filtering, and list columns
+    that come straight from the row.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
 
 @admin.register(models.Case)
-class CaseAdmin(admin.ModelAdmin):
-    pass
+class CaseAdmin(ScotusModelAdmin):
+    list_display = (
+        'caseissuesid', 'casename', 'term', 'naturalcourt',
+        'majvotes', 'minvotes', 'decisiondirection')
+    list_filter = (TermFilter, NaturalCourtFilter, DecisionDirectionFilter)
+
 
 @admin.register(models.Justice)
-class JusticeAdmin(admin.ModelAdmin):
-    pass
+class JusticeAdmin(ScotusModelAdmin):
+    list_display = ('justice', 'justicename', 'full_name', 'chief_justice')
+
 
 @admin.register(models.Vote)
-class VoteAdmin(admin.ModelAdmin):
-    pass
+class VoteAdmin(ScotusModelAdmin):
+    list_display = (
+        'voteid', 'justicename', 'casename', 'term', 'naturalcourt',
+        'vote', 'majority', 'direction')
+    list_filter = (TermFilter, NaturalCourtFilter, JusticeNameFilter)
+    # The primary key index serves this ordering; Meta.ordering would sort the whole table.
+    ordering = ('-voteid',)
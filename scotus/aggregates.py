@@ -0,0 +1,142 @@
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Sum
+
+from scotus import models
+from scotus import utils
+from scotus.matrix import VoteMatrix
+
+# The summary tables `build_aggregates` writes.
+AGGREGATES = (
+    models.JusticeTermVotes,
+    models.TermShare,
+    models.NaturalCourtShare,
+    models.JusticeAgreement,
+)
+
+# SCDB decisionDirection codes the case share views count:
+# conservative and liberal.
+SHARE_DIRECTIONS = ('1', '2')
+
+# Whether the summary tables exist, and when that was checked.
+_available = (None, 0)
+
+
+def ensure_tables():
+    global _available
+    created = utils.ensure_tables(*AGGREGATES)
+    _available = (None, 0)
+    return created
+
+
+def available():
+    """
+    Whether the summary tables exist, looked up again once the answer is
+    TABLE_COLUMNS_TIMEOUT seconds old. Every loader rebuilds them in the
+    transaction that changes cases or votes, so once they exist they
+    match Case.valid and Vote.valid.
+    """
+    global _available
+    found, checked = _available
+    if found is None or time.time() - checked > settings.TABLE_COLUMNS_TIMEOUT:
+        tables = set(connection.introspection.table_names())
+        found = all(model._meta.db_table in tables for model in AGGREGATES)
+        _available = (found, time.time())
+    return found
+
+
+def case_shares(column):
+    """
+    Valid cases decided in a conservative or liberal direction, counted
+    by `column`, 'term' or 'naturalcourt', and weighted_majvotes: a
+    values() queryset with a count per row. Reads TermShare or
+    NaturalCourtShare when they exist, and Case.valid otherwise.
+    """
+    if available():
+        model = {'term': models.TermShare, 'naturalcourt': models.NaturalCourtShare}[column]
+        return model.objects\
+            .filter(decisiondirection__in=SHARE_DIRECTIONS)\
+            .order_by()\
+            .values(column, 'weighted_majvotes')\
+            .annotate(count=Sum('count'))
+    return models.Case.valid\
+        .filter(decisiondirection__in=SHARE_DIRECTIONS)\
+        .order_by()\
+        .values(column, 'weighted_majvotes')\
+        .annotate(count=Count('pk'))
+
+
+def source_terms():
+    """
+    Every term with valid votes or cases.
+    """
+    terms = set(models.Vote.valid.order_by().values_list('term', flat=True).distinct())
+    terms |= set(models.Case.valid.order_by().values_list('term', flat=True).distinct())
+    return set(t for t in terms if t)
+
+
+def built_terms():
+    return set(models.TermShare.objects.order_by().values_list('term', flat=True).distinct())
+
+
+def build_term(term, matrix):
+    """
+    Replaces every aggregate row for one term. `matrix` is a VoteMatrix
+    holding at least this term's votes.
+    """
+    for model in AGGREGATES:
+        model.objects.filter(term=term).delete()
+
+    votes = models.Vote.valid.filter(term=term).order_by()
+    cases = models.Case.valid.filter(term=term).order_by()
+
+    models.JusticeTermVotes.objects.bulk_create([
+        models.JusticeTermVotes(term=term, **v)
+        for v in votes.values('justice', 'majvotes', 'majority').annotate(count=Count('pk'))
+    ])
+    models.TermShare.objects.bulk_create([
+        models.TermShare(term=term, **c)
+        for c in cases.values('decisiondirection', 'weighted_majvotes').annotate(count=Count('pk'))
+    ])
+    models.NaturalCourtShare.objects.bulk_create([
+        models.NaturalCourtShare(term=term, **c)
+        for c in cases.values('naturalcourt', 'decisiondirection', 'weighted_majvotes')\
+            .annotate(count=Count('pk'))
+    ])
+
+    agreement = matrix.agreement(term=term)
+    pairs = []
+    for i, justice in enumerate(matrix.justices):
+        for j, other_justice in enumerate(matrix.justices):
+            if i == j or not agreement['common'][i, j]:
+                continue
+            pairs.append(models.JusticeAgreement(
+                term=term,
+                justice=justice,
+                other_justice=other_justice,
+                common=int(agreement['common'][i, j]),
+                agree=int(agreement['agree'][i, j]),
+                disagree=int(agreement['disagree'][i, j])))
+    models.JusticeAgreement.objects.bulk_create(pairs)
+
+
+def vote_matrix(terms):
+    return VoteMatrix.from_queryset(models.Vote.valid.filter(term__in=terms))
+
+
+def rebuild():
+    """
+    Drops every aggregate row and builds every term again. Run it inside
+    the transaction that changed the votes and cases, so readers never see
+    aggregates out of step with them; call ensure_tables() before that
+    transaction. Returns the terms built.
+    """
+    for model in AGGREGATES:
+        model.objects.all().delete()
+    terms = sorted(source_terms())
+    matrix = vote_matrix(terms)
+    for term in terms:
+        build_term(term, matrix)
+    return terms
@@ -0,0 +1,20 @@
+from django.conf.urls import url
+
+from scotus import views
+
+# The JSON / CSV API on its own, for config.api: no admin or HTML pages,
+# so none of their apps or middleware have to be loaded.
+API = (
+    url(r'^api/v1/_stats/$', views.instrumentation_stats, name='stats'),
+    url(r'^api/v1/justice/liberal/(?P<term>\d+)/$', views.liberal_decisions_by_justice, name='justice-liberal'),
+    url(r'^api/v1/score/justice/$', views.justice_scores_by_term, name='score-justice'),
+    url(r'^api/v1/case/filter/$', views.filter_and_sum_api, name='case-filter'),
+    url(r'^api/v1/voting/justice/(?P<justicename>\w+)/', views.voting_clusters, name='voting-clusters'),
+    url(r'^api/v1/agreement/$', views.agreement_matrix, name='agreement'),
+    url(r'^api/v1/case/by-term/$', views.cases_by_term, name='case-by-term'),
+    url(r'^api/v1/case/by-court/$', views.cases_by_court, name='case-by-court'),
+    url(r'^api/v1/score/naturalcourt/$', views.scores_by_natural_court, name='score-naturalcourt'),
+    url(r'^api/v1/score/court/$', views.court_scores_by_term, name='score-court'),
+)
+
+urlpatterns = API
@@ -0,0 +1,20 @@
+from django.apps import AppConfig
+
+
+class ScotusConfig(AppConfig):
+    name = 'scotus'
+
+    def ready(self):
+        """
+        Wires up the caches that have to be dropped when new data is loaded.
+        """
+        from django.db.models.signals import post_delete, post_save
+        from scotus import matrix, models, responses, signals
+        signals.data_loaded.connect(matrix.invalidate, dispatch_uid='scotus.matrix')
+        signals.data_loaded.connect(responses.invalidate, dispatch_uid='scotus.responses')
+        signals.data_loaded.connect(responses.purge, dispatch_uid='scotus.responses.purge')
+        for cache in (models.justice_cache, models.case_cache):
+            uid = 'scotus.%s_cache' % cache.model.__name__.lower()
+            signals.data_loaded.connect(cache.invalidate, dispatch_uid=uid)
+            post_save.connect(cache.invalidate, sender=cache.model, dispatch_uid=uid)
+            post_delete.connect(cache.invalidate, sender=cache.model, dispatch_uid=uid)
@@ -0,0 +1,63 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, connection, connections
+
+from scotus import instrumentation
+
+_executor = None
+_lock = threading.Lock()
+
+
+def executor():
+    """
+    The process-wide pool of QUERY_FANOUT_WORKERS threads. Each worker
+    keeps its own database connection, subject to CONN_MAX_AGE, so the
+    pool doubles as a bounded set of connections.
+    """
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.QUERY_FANOUT_WORKERS)
+        return _executor
+
+
+def sequential():
+    """
+    Whether to run calls one after another in this thread: when fan-out is
+    off; inside a transaction, whose uncommitted rows other connections
+    can't see; or when CONN_MAX_AGE is 0, since every worker would then
+    open and close a connection for each call.
+    """
+    return (settings.QUERY_FANOUT_WORKERS < 2 or connection.in_atomic_block or
+            connection.settings_dict['CONN_MAX_AGE'] == 0)
+
+
+def run(call, measurement):
+    """
+    Runs `call` in a worker thread, counting its queries towards the
+    measurement of the request that fanned it out.
+    """
+    close_old_connections()
+    if measurement is not None:
+        instrumentation.count_queries(measurement)
+    try:
+        return call()
+    finally:
+        instrumentation.stop_counting()
+        close_old_connections()
+
+
+def fan_out(*calls):
+    """
+    Runs independent, read-only callables concurrently, each on its own
+    connection, and returns their results in order. Wall-clock time tracks
+    the slowest call rather than the sum of all of them.
+    Querysets must be evaluated inside the callables, e.g., with list().
+    """
+    if sequential():
+        return [call() for call in calls]
+    measurement = instrumentation.current()
+    futures = [executor().submit(run, call, measurement) for call in calls]
+    return [f.result() for f in futures]
@@ -0,0 +1,232 @@
+import datetime
+import random
+
+from django.db import transaction
+
+from scotus import aggregates
+from scotus import models
+from scotus import scdb
+from scotus import utils
+
+# Justices who sat from the 1946 term on, in order of appointment.
+JUSTICENAMES = (
+    'HLBlack', 'SFReed', 'FFrankfurter', 'WODouglas', 'FMurphy', 'RHJackson',
+    'WBRutledge', 'HHBurton', 'FMVinson', 'TCClark', 'SMinton', 'EWarren',
+    'JHarlan2', 'WJBrennan', 'CEWhittaker', 'PStewart', 'BRWhite', 'AJGoldberg',
+    'AFortas', 'TMarshall', 'WEBurger', 'HABlackmun', 'LFPowell', 'WHRehnquist',
+    'JPStevens', 'SDOConnor', 'AScalia', 'AMKennedy', 'DHSouter', 'CThomas',
+    'RBGinsburg', 'SGBreyer', 'JGRoberts', 'SAAlito', 'SSotomayor', 'EKagan',
+)
+FIRST_JUSTICE_ID = 78
+
+FIRST_TERM = 1946
+LAST_TERM = 2016
+
+# Roughly what SCDB has per term at 1x: cases (dockets), and the share
+# of them with a second issue or a second docket.
+CASES_PER_TERM = 125
+SECOND_ISSUE_SHARE = 0.08
+SECOND_DOCKET_SHARE = 0.03
+
+# (value, weight) pairs the codes are drawn from.
+DECISION_TYPES = (('1', 75), ('7', 12), ('2', 6), ('4', 3), ('5', 2), ('6', 2))
+DECISION_DIRECTIONS = (('1', 45), ('2', 45), ('3', 10))
+MAJORITY_VOTES = ((9, 35), (8, 10), (7, 15), (6, 15), (5, 25))
+RECUSAL_SHARE = 0.05
+CONCURRENCE_SHARE = 0.1
+
+
+def choice(rng, weighted):
+    """
+    Picks a value from (value, weight) pairs.
+    """
+    pick = rng.uniform(0, sum(w for _, w in weighted))
+    for value, weight in weighted:
+        pick -= weight
+        if pick <= 0:
+            return value
+    return weighted[-1][0]
+
+
+def weighted_majvotes(majvotes, minvotes, decisiondirection):
+    """
+    Case.set_weighted_majvotes for plain values.
+    """
+    weighted = majvotes
+    if majvotes + minvotes < 9:
+        weighted = models.WEIGHTED_VOTES[minvotes]
+    if decisiondirection == '1':
+        return weighted
+    if decisiondirection == '2':
+        return -weighted
+    return 0
+
+
+class Generator(object):
+    """
+    A synthetic but SCDB-shaped dataset: nine Justices sit each term and
+    are replaced one at a time, each change starting a new natural court,
+    and cases carry realistic mixes of decision types, directions and
+    vote splits. `scale` multiplies the number of cases per term.
+    The same seed always produces the same data.
+    """
+    def __init__(self, scale=1, seed=1946):
+        self.scale = scale
+        self.rng = random.Random(seed)
+        self.terms = list(range(FIRST_TERM, LAST_TERM + 1))
+        self.cases_per_term = max(1, int(round(CASES_PER_TERM * scale)))
+        self.digits = max(3, len(str(self.cases_per_term)))
+
+        # Justice i takes a seat i - 8 tenures after FIRST_TERM and keeps it
+        # for nine tenures, so exactly nine sit in any term.
+        tenure = (len(self.terms) + 1) / float(len(JUSTICENAMES) - 8)
+        self.justices = [
+            ("%s" % (FIRST_JUSTICE_ID + i), name, FIRST_TERM + (i - 8) * tenure, FIRST_TERM + (i + 1) * tenure)
+            for i, name in enumerate(JUSTICENAMES)
+        ]
+        self.courts = self.naturalcourts()
+
+    def bench(self, term):
+        return [(j, name) for j, name, start, end in self.justices if start <= term < end]
+
+    def naturalcourts(self):
+        """
+        The natural court of each term: a new one whenever the bench changes.
+        """
+        courts = {}
+        code = 1300
+        previous = None
+        for term in self.terms:
+            bench = self.bench(term)
+            if bench != previous:
+                code += 1
+                previous = bench
+            courts[term] = code
+        return courts
+
+    def static_rows(self):
+        """
+        The Justices and natural courts, keyed by model.
+        """
+        rows = {models.Justice: [], models.NaturalCourt: []}
+        for j, name, start, end in self.justices:
+            rows[models.Justice].append({
+                "justice": j, "justicename": name, "full_name": name,
+                "chief_justice": name in ('FMVinson', 'EWarren', 'WEBurger', 'WHRehnquist', 'JGRoberts'),
+            })
+        for code in sorted(set(self.courts.values())):
+            rows[models.NaturalCourt].append({"naturalcourt": code, "chief": None})
+        return rows
+
+    def term_rows(self, term):
+        """
+        The scores, cases and votes of one term, keyed by model.
+        """
+        rows = dict((m, []) for m in (models.CourtTerm, models.JusticeTerm, models.Case, models.Vote))
+        scores = []
+        for j, name in self.bench(term):
+            score = self.rng.gauss(0, 2)
+            scores.append(score)
+            rows[models.JusticeTerm].append({
+                "term": "%s" % term, "justice": j, "justicename": name,
+                "justiceterm": "%s%s" % (j, term), "code": j,
+                "post_mn": score, "post_sd": abs(self.rng.gauss(0.3, 0.1)),
+                "post_med": score, "post_025": score - 0.6, "post_975": score + 0.6,
+            })
+        scores.sort()
+        rows[models.CourtTerm].append({
+            "term": "%s" % term, "med": scores[len(scores) // 2], "med_sd": 0.2,
+            "min": scores[0], "max": scores[-1],
+        })
+        for number in range(self.cases_per_term):
+            self.add_case(rows, term, self.courts[term], number)
+        return rows
+
+    def add_case(self, rows, term, naturalcourt, number):
+        """
+        Adds one case, its extra dockets / issues and their votes.
+        """
+        rng = self.rng
+        caseid = "%s-%0*d" % (term, self.digits, number)
+        decided = datetime.date(term + 1, rng.randint(1, 6), rng.randint(1, 28))
+        dockets = 2 if rng.random() < SECOND_DOCKET_SHARE else 1
+        issues = 2 if rng.random() < SECOND_ISSUE_SHARE else 1
+        decisiontype = choice(rng, DECISION_TYPES)
+        bench = self.bench(term)
+        if rng.random() < RECUSAL_SHARE:
+            bench = bench[:-1]
+        casename = "PETITIONER %s v. RESPONDENT" % caseid
+
+        for docket in range(1, dockets + 1):
+            docketid = "%s-%02d" % (caseid, docket)
+            for issue in range(1, issues + 1):
+                caseissuesid = "%s-%02d" % (docketid, issue)
+                decisiondirection = choice(rng, DECISION_DIRECTIONS)
+                majvotes = min(choice(rng, MAJORITY_VOTES), len(bench))
+                minvotes = len(bench) - majvotes
+                weighted = weighted_majvotes(majvotes, minvotes, decisiondirection)
+                case = {
+                    "term": "%s" % term, "caseid": caseid, "docketid": docketid,
+                    "caseissuesid": caseissuesid, "docket": "%s-%s" % (term - 1900, number),
+                    "datedecision": decided, "decisiontype": decisiontype,
+                    "naturalcourt": "%s" % naturalcourt, "casename": casename,
+                    "issue": "%s" % rng.randint(10010, 140080),
+                    "issuearea": "%s" % rng.randint(1, 14),
+                    "decisiondirection": decisiondirection,
+                    "majvotes": "%s" % majvotes, "minvotes": "%s" % minvotes,
+                    "weighted_majvotes": weighted,
+                }
+                rows[models.Case].append(case)
+
+                dissenters = set(rng.sample(range(len(bench)), minvotes))
+                for seat, (j, name) in enumerate(bench):
+                    dissent = seat in dissenters
+                    vote = '2' if dissent else ('3' if rng.random() < CONCURRENCE_SHARE else '1')
+                    direction = decisiondirection
+                    if dissent and decisiondirection in ('1', '2'):
+                        direction = '2' if decisiondirection == '1' else '1'
+                    rows[models.Vote].append({
+                        "caseid": caseid, "docketid": docketid, "caseissuesid": caseissuesid,
+                        "voteid": "%s-%02d" % (caseissuesid, seat + 1),
+                        "datedecision": decided.strftime('%m/%d/%Y'),
+                        "decisiontype": decisiontype, "term": "%s" % term,
+                        "naturalcourt": "%s" % naturalcourt, "casename": casename,
+                        "decisiondirection": decisiondirection,
+                        "majvotes": "%s" % majvotes, "minvotes": "%s" % minvotes,
+                        "justice": j, "justicename": name, "vote": vote,
+                        "direction": direction,
+                        "majority": '1' if dissent else '2',
+                        "weighted_majvotes": weighted,
+                    })
+
+
+def load(generator, replace=False, stdout=None):
+    """
+    Creates the SCDB tables if needed and fills them from `generator`,
+    one term at a time, then builds the summary tables from them. Refuses
+    to touch tables that already have rows unless `replace`. Returns the
+    row count per table.
+    """
+    tables = (
+        models.Justice, models.NaturalCourt, models.CourtTerm,
+        models.JusticeTerm, models.Case, models.Vote)
+    utils.ensure_tables(*tables)
+    aggregates.ensure_tables()
+    utils.forget_columns()
+    filled = [m for m in tables if m.objects.exists()]
+    if filled and not replace:
+        raise ValueError("%s already have rows." % ", ".join(m._meta.db_table for m in filled))
+
+    counts = dict((m._meta.db_table, 0) for m in tables)
+    with transaction.atomic():
+        for model in filled:
+            model.objects.all().delete()
+        for model, rows in generator.static_rows().items():
+            counts[model._meta.db_table] += scdb.insert_rows(model, rows)
+        for term in generator.terms:
+            for model, rows in generator.term_rows(term).items():
+                counts[model._meta.db_table] += scdb.insert_rows(model, rows)
+            if stdout is not None:
+                stdout.write("Generated %s." % term)
+        aggregates.rebuild()
+    return counts
@@ -0,0 +1,159 @@
+import re
+
+from django.db import connection
+from django.db.models import Count, Q
+
+from scotus import models
+from scotus import planner
+from scotus import utils
+
+# The ValidCasesManager predicate, for partial indexes that only cover
+# the rows Vote.valid / Case.valid can return.
+VALID_PREDICATE = "decisiontype IN ('1', '7') AND docketid LIKE '%-01' AND caseissuesid LIKE '%-01'"
+
+
+def concurrently():
+    if connection.vendor == 'postgresql':
+        return " CONCURRENTLY"
+    return ""
+
+
+class Index(object):
+    """
+    An index the API's queries rely on. The SCDB tables are unmanaged,
+    so these are created by the `scotus_indexes` command, not migrations.
+    """
+    def __init__(self, name, table, columns, where=None):
+        self.name = name
+        self.table = table
+        self.columns = tuple(columns)
+        self.where = where
+
+    def create_sql(self):
+        """
+        CREATE INDEX for the current database. PostgreSQL builds it
+        CONCURRENTLY so the API keeps reading the table meanwhile.
+        """
+        sql = "CREATE INDEX%s IF NOT EXISTS %s ON %s (%s)" % (
+            concurrently(),
+            connection.ops.quote_name(self.name),
+            connection.ops.quote_name(self.table),
+            ", ".join(connection.ops.quote_name(c) for c in self.columns))
+        if self.where:
+            sql += " WHERE %s" % self.where
+        return sql
+
+    def drop_sql(self):
+        return "DROP INDEX%s IF EXISTS %s" % (
+            concurrently(), connection.ops.quote_name(self.name))
+
+    def __str__(self):
+        description = "%s ON %s (%s)" % (self.name, self.table, ", ".join(self.columns))
+        if self.where:
+            description += " WHERE valid"
+        return description
+
+
+INDEXES = (
+    # Vote.valid by justice and term: liberal_decisions_by_justice,
+    # the swing justice counts in cases_by_term, generate_records.
+    Index('votes_valid_justice_term', 'votes', ('justice', 'term'), VALID_PREDICATE),
+    Index('votes_valid_term_wmv', 'votes', ('term', 'weighted_majvotes'), VALID_PREDICATE),
+    # Vote.objects lookups in voting_clusters.
+    Index('votes_justice_term', 'votes', ('justice', 'term')),
+    Index('votes_justicename_term', 'votes', ('justicename', 'term')),
+    Index('votes_caseid', 'votes', ('caseid',)),
+    Index('votes_naturalcourt', 'votes', ('naturalcourt',)),
+    # Case.valid grouped by term / natural court: cases_by_term, cases_by_court.
+    Index('cases_valid_term_dir_wmv', 'cases',
+          ('term', 'decisiondirection', 'weighted_majvotes'), VALID_PREDICATE),
+    Index('cases_valid_naturalcourt_dir_wmv', 'cases',
+          ('naturalcourt', 'decisiondirection', 'weighted_majvotes'), VALID_PREDICATE),
+    # Case lookups by caseid and the filter API's default term filter.
+    Index('cases_caseid', 'cases', ('caseid',)),
+    Index('cases_term', 'cases', ('term',)),
+    Index('justice_terms_term', 'justice_terms', ('term',)),
+    Index('scotus_justices_justicename', 'scotus_justices', ('justicename',)),
+)
+
+# Partial indexes on the is_valid column scotus.validity adds, which
+# ValidCasesManager filters on instead of VALID_PREDICATE once it exists.
+VALIDITY_INDEXES = (
+    Index('votes_is_valid_justice_term', 'votes', ('justice', 'term'), 'is_valid'),
+    Index('votes_is_valid_term_wmv', 'votes', ('term', 'weighted_majvotes'), 'is_valid'),
+    Index('cases_is_valid_term_dir_wmv', 'cases',
+          ('term', 'decisiondirection', 'weighted_majvotes'), 'is_valid'),
+    Index('cases_is_valid_naturalcourt_dir_wmv', 'cases',
+          ('naturalcourt', 'decisiondirection', 'weighted_majvotes'), 'is_valid'),
+)
+
+
+def expected_indexes():
+    """
+    INDEXES, plus VALIDITY_INDEXES on the tables with a generated is_valid column.
+    """
+    expected = list(INDEXES)
+    for index in VALIDITY_INDEXES:
+        if utils.VALID_COLUMN in utils.generated_columns(index.table):
+            expected.append(index)
+    return expected
+
+
+def existing_indexes():
+    """
+    Names of the indexes in the database, mapped to whether they are
+    usable. A failed CREATE INDEX CONCURRENTLY leaves an invalid index.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                "SELECT c.relname, i.indisvalid FROM pg_index i "
+                "JOIN pg_class c ON c.oid = i.indexrelid")
+            return dict(cursor.fetchall())
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+        return dict((row[0], True) for row in cursor.fetchall())
+
+
+def api_queries(term, justice, justicename):
+    """
+    Querysets shaped like the ones each API view runs, for EXPLAIN.
+    """
+    valid_cases = models.Case.valid.filter(decisiondirection__in=['2', '1']).order_by()
+    return (
+        ('voting_clusters: positions', models.Vote.objects.filter(
+            Q(justice=justice) | Q(justicename__in=[justicename]), term=term)\
+            .order_by().values_list('caseid', 'justice', 'justicename', 'vote')),
+        ('voting_clusters: cases', models.Case.objects.filter(caseid__in=['x'])\
+            .order_by('caseissuesid').values('caseid', 'casename')),
+        ('cases_by_term: shares', valid_cases\
+            .values('term', 'weighted_majvotes').annotate(count=Count('pk'))),
+        ('cases_by_term: swing justices', models.Vote.valid.filter(
+            justice__in=[justice], weighted_majvotes__in=[-5, 5], majority="2",
+            decisiondirection__in=['2', '1']).order_by()\
+            .values('term', 'justice', 'weighted_majvotes').annotate(count=Count('pk'))),
+        ('cases_by_court: shares', valid_cases\
+            .values('naturalcourt', 'weighted_majvotes').annotate(count=Count('pk'))),
+        ('liberal_decisions_by_justice', models.Vote.valid.filter(term=term).order_by()\
+            .values('justice').annotate(count=Count('pk'))),
+        ('filter_and_sum_api', planner.CaseQueryPlanner().compile({'term': [term]}).rows()),
+        ('justice_obj', models.Justice.objects.filter(justicename=justicename)),
+    )
+
+
+def used_indexes(queryset):
+    """
+    The indexes the database plans to use for a queryset.
+    """
+    plan = planner.explain(queryset)['plan']
+    names = set()
+    if connection.vendor == 'postgresql':
+        nodes = [plan[0]['Plan']]
+        while nodes:
+            node = nodes.pop()
+            if 'Index Name' in node:
+                names.add(node['Index Name'])
+            nodes.extend(node.get('Plans', []))
+    else:
+        for detail in plan:
+            names.update(re.findall(r'USING (?:COVERING )?INDEX (\w+)', detail))
+    return sorted(names)
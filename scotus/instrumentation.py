@@ -0,0 +1,271 @@
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from functools import wraps
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+import ujson
+
+try:
+    from django.utils.deprecation import MiddlewareMixin
+except ImportError:
+    MiddlewareMixin = object
+
+logger = logging.getLogger('scotus.instrumentation')
+
+_local = threading.local()
+_lock = threading.Lock()
+
+
+def current():
+    """
+    The Measurement of the request this thread is serving, if any.
+    """
+    return getattr(_local, 'measurement', None)
+
+
+@contextmanager
+def phase(name):
+    """
+    Times a block as a named phase of the current request, e.g., 'serialize'.
+    Does nothing outside an instrumented request.
+    """
+    start = time.time()
+    try:
+        yield
+    finally:
+        measurement = current()
+        if measurement is not None:
+            measurement.add(name, time.time() - start)
+
+
+class CountingCursor(object):
+    """
+    Wraps a cursor of one connection and counts the queries it runs, and
+    their time, towards a Measurement.
+    """
+    def __init__(self, cursor, measurement):
+        self.cursor = cursor
+        self.measurement = measurement
+
+    def __getattr__(self, attr):
+        return getattr(self.cursor, attr)
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return self.cursor.__exit__(exc_type, exc_value, traceback)
+
+    def timed(self, method, *args):
+        start = time.time()
+        try:
+            return method(*args)
+        finally:
+            self.measurement.add_query(time.time() - start)
+
+    def execute(self, sql, params=None):
+        return self.timed(self.cursor.execute, sql, params)
+
+    def executemany(self, sql, param_list):
+        return self.timed(self.cursor.executemany, sql, param_list)
+
+    def callproc(self, procname, params=None):
+        return self.timed(self.cursor.callproc, procname, params)
+
+
+def count_queries(measurement):
+    """
+    Counts the queries this thread's connection runs towards `measurement`,
+    until stop_counting(). Connections belong to one thread, so concurrent
+    requests can't see each other's queries, and nothing depends on DEBUG
+    or on connection.queries, which only keeps the last few thousand.
+    """
+    db = connections[DEFAULT_DB_ALIAS]
+    prepare = type(db)._prepare_cursor
+    db._prepare_cursor = lambda cursor: CountingCursor(prepare(db, cursor), measurement)
+
+
+def stop_counting():
+    db = connections[DEFAULT_DB_ALIAS]
+    if '_prepare_cursor' in db.__dict__:
+        del db._prepare_cursor
+
+
+def dumps(payload, **kwargs):
+    """
+    json.dumps, timed as the 'serialize' phase. With settings.FAST_JSON,
+    plain payloads go through ujson instead, which writes the same JSON
+    without the spaces after separators; json.dumps takes over for
+    anything ujson can't encode, e.g., NaN.
+    """
+    with phase('serialize'):
+        if settings.FAST_JSON and not kwargs:
+            try:
+                return ujson.dumps(payload, escape_forward_slashes=False)
+            except (OverflowError, TypeError, ValueError):
+                pass
+        return json.dumps(payload, **kwargs)
+
+
+def request_name(request, default=None):
+    """
+    The URL name of the request, which its timings are grouped by.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is not None:
+        return match.url_name or match.view_name
+    return default or request.path
+
+
+class RollingStats(object):
+    """
+    The last `size` timings of each URL name, for percentiles.
+    Process-local; every worker keeps its own window.
+    """
+    METRICS = ('total_ms', 'db_ms', 'serialize_ms', 'queries')
+    PERCENTILES = (50, 90, 99)
+
+    def __init__(self, size):
+        self.size = size
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, sample):
+        with self._lock:
+            if name not in self._samples:
+                self._samples[name] = deque(maxlen=self.size)
+            self._samples[name].append(sample)
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def percentile(self, values, pct):
+        """
+        Nearest-rank percentile of a sorted list.
+        """
+        index = int(round(pct / 100.0 * (len(values) - 1)))
+        return values[index]
+
+    def summary(self):
+        """
+        Count and percentiles of every metric, per URL name.
+        """
+        with self._lock:
+            samples = dict((name, list(s)) for name, s in self._samples.items())
+        payload = OrderedDict()
+        for name in sorted(samples):
+            entry = OrderedDict([("count", len(samples[name]))])
+            for metric in self.METRICS:
+                values = sorted(s[metric] for s in samples[name])
+                entry[metric] = OrderedDict(
+                    ("p%s" % pct, self.percentile(values, pct)) for pct in self.PERCENTILES)
+            payload[name] = entry
+        return payload
+
+
+stats = RollingStats(settings.INSTRUMENTATION_WINDOW)
+
+
+class Measurement(object):
+    """
+    Query count, database time, named phases and total time of one request.
+    """
+    def __init__(self):
+        self.phases = OrderedDict()
+        self.queries = 0
+        self.db_time = 0.0
+
+    def start(self):
+        self.started = time.time()
+        count_queries(self)
+        _local.measurement = self
+
+    def stop(self):
+        stop_counting()
+        _local.measurement = None
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def add_query(self, seconds):
+        """
+        Counts one query, run on this request's connection or, for fanned
+        out calls, on another thread's.
+        """
+        with _lock:
+            self.queries += 1
+            self.db_time += seconds
+
+    def finish(self, request, response, name=None):
+        """
+        Stops measuring, records the timings and adds a Server-Timing header.
+        """
+        total = time.time() - self.started
+        self.stop()
+
+        sample = {
+            "total_ms": round(total * 1000, 2),
+            "db_ms": round(self.db_time * 1000, 2),
+            "serialize_ms": round(self.phases.get('serialize', 0.0) * 1000, 2),
+            "queries": self.queries,
+        }
+        name = name or request_name(request)
+        stats.add(name, sample)
+
+        timings = ['db;dur=%s;desc="%s queries"' % (sample['db_ms'], sample['queries'])]
+        for phase_name, seconds in self.phases.items():
+            timings.append('%s;dur=%s' % (phase_name, round(seconds * 1000, 2)))
+        timings.append('total;dur=%s' % sample['total_ms'])
+        response['Server-Timing'] = ', '.join(timings)
+
+        logger.info(
+            "request name=%s method=%s path=%s status=%s queries=%s db_ms=%s serialize_ms=%s total_ms=%s",
+            name, request.method, request.path, response.status_code,
+            sample['queries'], sample['db_ms'], sample['serialize_ms'], sample['total_ms'])
+        return response
+
+
+def instrumented(view):
+    """
+    Decorator for API views: measures the view unless InstrumentationMiddleware
+    already measures the whole request. Streamed responses are only timed
+    up to the point they start streaming.
+    """
+    @wraps(view)
+    def inner(request, *args, **kwargs):
+        if current() is not None:
+            return view(request, *args, **kwargs)
+        measurement = Measurement()
+        measurement.start()
+        try:
+            response = view(request, *args, **kwargs)
+        except Exception:
+            measurement.stop()
+            raise
+        return measurement.finish(request, response, request_name(request, view.__name__))
+    return inner
+
+
+class InstrumentationMiddleware(MiddlewareMixin):
+    """
+    Measures every request, middleware included. Put it first in
+    MIDDLEWARE_CLASSES.
+    """
+    def process_request(self, request):
+        request._measurement = Measurement()
+        request._measurement.start()
+
+    def process_response(self, request, response):
+        measurement = getattr(request, '_measurement', None)
+        if measurement is None or current() is not measurement:
+            return response
+        return measurement.finish(request, response)
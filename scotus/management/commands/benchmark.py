@@ -0,0 +1,209 @@
+import datetime
+import json
+import platform
+import re
+import time
+import tracemalloc
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.core.urlresolvers import NoReverseMatch, reverse
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import urlencode
+
+from scotus import matrix
+from scotus import models
+from scotus import responses
+from scotus import urls
+
+# URL kwargs and query parameters for each API URL name. {term},
+# {justicename} and {justices} are filled in from the data.
+REQUESTS = {
+    'justice-liberal': ({'term': '{term}'}, {}),
+    'case-filter': ({}, {'term': '{term}'}),
+    'voting-clusters': ({'justicename': '{justicename}'}, {'term': '{term}', 'justices': '{justices}'}),
+    'agreement': ({}, {'term': '{term}'}),
+}
+
+# The query count in an instrumented response's Server-Timing header.
+QUERY_COUNT = re.compile(r'desc="(\d+) queries"')
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[int(round(pct / 100.0 * (len(values) - 1)))]
+
+
+class Command(BaseCommand):
+    help = "Times every API endpoint through the test client and writes the results as JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat', type=int, dest='repeat', default=10,
+            help="Warm requests per endpoint, after one cold one.")
+        parser.add_argument(
+            '--output', dest='output', default=None,
+            help="Write the results to this JSON file.")
+        parser.add_argument(
+            '--baseline', dest='baseline', default=None,
+            help="Compare with the results in this JSON file.")
+        parser.add_argument(
+            '--threshold', type=float, dest='threshold', default=1.25,
+            help="Fail when a warm p50 is this many times the baseline's.")
+
+    def sample_values(self):
+        """
+        A recent term, a Justice who sat in it and two colleagues.
+        """
+        term = models.Case.objects.order_by('-term').values_list('term', flat=True).first()
+        names = list(models.Vote.objects.filter(term=term).order_by('justicename')\
+            .values_list('justicename', flat=True).distinct()[:3])
+        if term is None or not names:
+            raise CommandError("There is no data to benchmark; run generate_fixtures first.")
+        return {"term": term, "justicename": names[0], "justices": ",".join(names[1:])}
+
+    def endpoints(self):
+        """
+        (URL name, path) for every pattern in scotus.urls.API.
+        """
+        values = self.sample_values()
+        for pattern in urls.API:
+            kwargs, query = REQUESTS.get(pattern.name, ({}, {}))
+            kwargs = dict((k, v.format(**values)) for k, v in kwargs.items())
+            query = dict((k, v.format(**values)) for k, v in query.items())
+            try:
+                path = reverse(pattern.name, kwargs=kwargs)
+            except NoReverseMatch:
+                self.stderr.write("Skipping %s: add it to REQUESTS." % pattern.name)
+                continue
+            if query:
+                path += '?' + urlencode(sorted(query.items()))
+            yield pattern.name, path
+
+    def reset(self):
+        """
+        Drops every in-process cache, so the next request is cold.
+        """
+        responses.invalidate()
+        responses.purge()
+        matrix.invalidate()
+        models.justice_cache.invalidate()
+        models.case_cache.invalidate()
+
+    def fetch(self, client, path):
+        """
+        Requests `path` and reads the whole body. Returns (seconds, response, bytes).
+        """
+        start = time.time()
+        response = client.get(path)
+        if getattr(response, 'streaming', False):
+            size = sum(len(chunk) for chunk in response.streaming_content)
+        else:
+            size = len(response.content)
+        return time.time() - start, response, size
+
+    def measure(self, client, path, repeat):
+        """
+        One cold request with its queries, `repeat` warm ones, and one more
+        cold one under tracemalloc for peak memory.
+        """
+        self.reset()
+        with CaptureQueriesContext(connection) as captured:
+            cold, response, size = self.fetch(client, path)
+        # Read now: captured slices the connection's log, which later requests reset.
+        # Server-Timing also counts queries fanned out to other connections.
+        queries = len(captured)
+        timing = QUERY_COUNT.search(response.get('Server-Timing', ''))
+        if timing:
+            queries = int(timing.group(1))
+        warm = [self.fetch(client, path)[0] for _ in range(repeat)]
+
+        self.reset()
+        tracemalloc.start()
+        self.fetch(client, path)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        warm = warm or [cold]
+        return {
+            "path": path,
+            "status": response.status_code,
+            "bytes": size,
+            "queries": queries,
+            "cold_ms": round(cold * 1000, 2),
+            "min_ms": round(min(warm) * 1000, 2),
+            "p50_ms": round(percentile(warm, 50) * 1000, 2),
+            "p90_ms": round(percentile(warm, 90) * 1000, 2),
+            "mean_ms": round(sum(warm) / len(warm) * 1000, 2),
+            "peak_kb": round(peak / 1024.0, 1),
+        }
+
+    def compare(self, results, baseline, threshold):
+        """
+        Prints each endpoint against the baseline. Returns the regressions.
+        """
+        regressions = []
+        for name, result in sorted(results.items()):
+            before = baseline.get(name, None)
+            if 'error' in result:
+                if before is not None and 'error' in before:
+                    self.stdout.write("%-20s error, as in the baseline" % name)
+                else:
+                    regressions.append(name)
+                    self.stdout.write("%-20s error  REGRESSION" % name)
+                continue
+            if before is None or 'error' in before:
+                self.stdout.write("%-20s new" % name)
+                continue
+            ratio = result['p50_ms'] / before['p50_ms'] if before['p50_ms'] else 1.0
+            line = "%-20s p50 %8.2fms -> %8.2fms (%.2fx)  queries %s -> %s" % (
+                name, before['p50_ms'], result['p50_ms'], ratio, before['queries'], result['queries'])
+            if ratio > threshold or result['queries'] > before['queries']:
+                regressions.append(name)
+                line += "  REGRESSION"
+            self.stdout.write(line)
+        return regressions
+
+    def handle(self, *args, **options):
+        """
+        Base command that runs when the management command is triggered.
+        """
+        client = Client()
+        results = {}
+        for name, path in self.endpoints():
+            try:
+                results[name] = self.measure(client, path, options['repeat'])
+            except Exception as e:
+                results[name] = {"path": path, "error": "%r" % e}
+                self.stdout.write("%-20s error: %r" % (name, e))
+                continue
+            r = results[name]
+            self.stdout.write("%-20s %s  cold %8.2fms  p50 %8.2fms  %3s queries  %8.1fKB peak" % (
+                name, r['status'], r['cold_ms'], r['p50_ms'], r['queries'], r['peak_kb']))
+
+        payload = {
+            "meta": {
+                "date": datetime.datetime.utcnow().isoformat(),
+                "database": connection.vendor,
+                "django": django.get_version(),
+                "python": platform.python_version(),
+                "repeat": options['repeat'],
+                "cases": models.Case.objects.count(),
+                "votes": models.Vote.objects.count(),
+            },
+            "results": results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(payload, f, indent=2, sort_keys=True)
+            self.stdout.write("Wrote %s." % options['output'])
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)['results']
+            self.stdout.write("")
+            regressions = self.compare(results, baseline, options['threshold'])
+            if regressions:
+                raise CommandError("Slower than the baseline: %s" % ", ".join(regressions))
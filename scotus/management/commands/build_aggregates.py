@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from scotus import aggregates
+from scotus import utils
+
+class Command(BaseCommand):
+    help = "Materializes the summary tables of valid votes and cases, one term at a time."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--term', action='append', dest='terms',
+            help="Rebuild this term; repeat for several.")
+        parser.add_argument(
+            '--full', action='store_true', dest='full', default=False,
+            help="Rebuild every term from scratch, in one transaction.")
+
+    def terms_to_build(self, options):
+        """
+        Terms named on the command line; otherwise terms that have no
+        aggregates yet, plus the current term.
+        """
+        if options['terms']:
+            return sorted(options['terms'])
+        built = aggregates.built_terms()
+        return sorted(
+            t for t in aggregates.source_terms()
+            if t not in built or t == utils.current_term())
+
+    def handle(self, *args, **options):
+        """
+        Base command that runs when the management command is triggered.
+        """
+        start = time.time()
+        for model in aggregates.ensure_tables():
+            self.stdout.write("Created %s." % model._meta.db_table)
+
+        if options['full']:
+            with transaction.atomic():
+                terms = aggregates.rebuild()
+            self.stdout.write("Rebuilt %s terms in %.2fs." % (len(terms), time.time() - start))
+            return
+
+        terms = self.terms_to_build(options)
+        if not terms:
+            self.stdout.write("Aggregates are up to date.")
+            return
+
+        matrix = aggregates.vote_matrix(terms)
+        for term in terms:
+            with transaction.atomic():
+                aggregates.build_term(term, matrix)
+            self.stdout.write("Built aggregates for %s." % term)
+        self.stdout.write("Built %s terms in %.2fs." % (len(terms), time.time() - start))
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from scotus import models
+from scotus import typed
+
+class Command(BaseCommand):
+    help = "Converts votes into the compact votes_typed table, all of it or one term at a time."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--term', action='append', dest='terms',
+            help="Rebuild this term; repeat for several. Defaults to all terms.")
+
+    def handle(self, *args, **options):
+        """
+        Base command that runs when the management command is triggered.
+        """
+        if typed.ensure_table():
+            self.stdout.write("Created %s." % models.TypedVote._meta.db_table)
+
+        terms = options['terms']
+        start = time.time()
+        with transaction.atomic():
+            count = typed.rebuild(terms)
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE %s" % connection.ops.quote_name(models.TypedVote._meta.db_table))
+
+        self.stdout.write("Converted %s votes for %s in %.2fs." % (
+            count, ', '.join(terms) if terms else 'all terms', time.time() - start))
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from scotus import fixtures
+
+class Command(BaseCommand):
+    help = "Fills the SCDB tables with synthetic data for benchmarking. Never run it against real data."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', type=float, dest='scale', default=1,
+            help="Multiple of SCDB's real size, 1946 to present, e.g., 1, 10 or 100.")
+        parser.add_argument(
+            '--seed', type=int, dest='seed', default=1946,
+            help="Random seed; the same seed and scale give the same data.")
+        parser.add_argument(
+            '--replace', action='store_true', dest='replace', default=False,
+            help="Delete the rows already in the tables first.")
+
+    def handle(self, *args, **options):
+        """
+        Base command that runs when the management command is triggered.
+        """
+        start = time.time()
+        generator = fixtures.Generator(scale=options['scale'], seed=options['seed'])
+        try:
+            counts = fixtures.load(generator, replace=options['replace'], stdout=self.stdout)
+        except ValueError as e:
+            raise CommandError("%s Pass --replace to overwrite them." % e)
+        for table, count in sorted(counts.items()):
+            self.stdout.write("%s: %s rows" % (table, count))
+        self.stdout.write("Generated %sx in %.2fs." % (options['scale'], time.time() - start))
@@ -4,7 +4,7 @@ from django.core.management.base import BaseCommand
 from django.conf import settings
 import ujson as json
 
-from scotus.models import Vote
+from scotus.matrix import get_vote_matrix
 
 class Command(BaseCommand):
 
@@ -13,6 +13,7 @@ class Command(BaseCommand):
         Base command that runs when the management command is triggered.
         """
         justices = settings.ACTIVE_JUSTICES + settings.INACTIVE_JUSTICES
+        matrix = get_vote_matrix()
         payload = {}
         for j in justices:
             payload[j['justicename']] = {
@@ -26,12 +27,12 @@ class Command(BaseCommand):
                     4: {"majority": 0, "dissent": 0},
                 }
             }
-            votes = [
-                (v['majvotes'], v['majority'], v['term'])\
-                for v in Vote.valid.filter(justice=j['justice'])\
-                    .values('majvotes', 'majority', 'term')
-            ]
-            for majvotes, majority, term in votes:
+
+            # From http://scdb.wustl.edu/documentation.php?var=majority
+            # "1" means dissent, "2" means majority
+            counts = matrix.majority_counts(j['justice'])
+            for (term, majvotes), sides in sorted(counts.items()):
+                term = "%s" % term
                 if not payload[j['justicename']]['terms'].get(term, None):
                     payload[j['justicename']]['terms'][term] = {
                         9: {"majority": 0, "dissent": 0},
@@ -42,14 +43,10 @@ class Command(BaseCommand):
                         4: {"majority": 0, "dissent": 0},
                     }
 
-
-                # From http://scdb.wustl.edu/documentation.php?var=majority
-                # "1" means dissent, "2" means majority
-                if majority == "2":
-                    payload[j['justicename']]['all-time'][majvotes]['majority'] += 1
-                    payload[j['justicename']]['terms'][term][majvotes]['majority'] += 1
-                if majority == "1":
-                    payload[j['justicename']]['all-time'][majvotes]['dissent'] += 1
-                    payload[j['justicename']]['terms'][term][majvotes]['dissent'] += 1
+                for side, count in sides.items():
+                    payload[j['justicename']]['all-time']\
+                        .setdefault(majvotes, {"majority": 0, "dissent": 0})[side] += count
+                    payload[j['justicename']]['terms'][term]\
+                        .setdefault(majvotes, {"majority": 0, "dissent": 0})[side] += count
 
         sys.stdout.write(json.dumps(payload))
@@ -0,0 +1,59 @@
+import io
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from scotus import aggregates
+from scotus import scdb
+from scotus import signals
+from scotus import typed
+from scotus import utils
+
+class Command(BaseCommand):
+    help = "Reconciles the current term's cases and votes with an SCDB justice-centered CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help="The SCDB CSV, or - to read it from stdin.")
+        parser.add_argument(
+            '--term', dest='term', default=None,
+            help="The term to reconcile. Defaults to the current term.")
+
+    def handle(self, *args, **options):
+        """
+        Base command that runs when the management command is triggered.
+        """
+        term = options['term'] or utils.current_term()
+        start = time.time()
+
+        ingest = scdb.Ingest(term)
+        if options['path'] == '-':
+            ingest.read(sys.stdin)
+        else:
+            with io.open(options['path'], encoding='utf-8', errors='replace', newline='') as f:
+                ingest.read(f)
+
+        aggregates.ensure_tables()
+        if settings.TYPED_VOTES:
+            typed.ensure_table()
+
+        # The changed rows and everything derived from them commit together.
+        with transaction.atomic():
+            counts = ingest.apply()
+            for name in ('cases', 'votes'):
+                self.stdout.write("%s: %s new, %s changed" % ((name,) + counts[name]))
+            if not any(sum(c) for c in counts.values()):
+                self.stdout.write("Term %s is up to date." % term)
+                return
+
+            # is_valid, where the column exists, is computed by the database.
+            scdb.recompute_weighted_majvotes([term])
+            aggregates.build_term(term, aggregates.vote_matrix([term]))
+            if settings.TYPED_VOTES:
+                typed.rebuild([term])
+            transaction.on_commit(
+                lambda: signals.data_loaded.send(sender=self.__class__, terms=[term]))
+        self.stdout.write("Reconciled term %s in %.2fs." % (term, time.time() - start))
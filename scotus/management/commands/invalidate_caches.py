@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from scotus import signals
+
+class Command(BaseCommand):
+    help = "Drops cached data and responses after the loaders import new data."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--term', action='append', dest='terms',
+            help="A term that changed; repeat for several. Defaults to all terms.")
+
+    def handle(self, *args, **options):
+        """
+        Base command that runs when the management command is triggered.
+        """
+        signals.data_loaded.send(sender=self.__class__, terms=options['terms'])
+        self.stdout.write("Invalidated cached data for %s." % (
+            ', '.join(options['terms']) if options['terms'] else 'all terms'))
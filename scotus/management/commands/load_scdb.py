@@ -0,0 +1,56 @@
+import io
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from scotus import aggregates
+from scotus import models
+from scotus import scdb
+from scotus import signals
+from scotus import typed
+
+class Command(BaseCommand):
+    help = "Replaces every case and vote with an SCDB justice-centered CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="The SCDB justice-centered CSV.")
+
+    def handle(self, *args, **options):
+        """
+        Base command that runs when the management command is triggered.
+        The new rows and everything derived from them commit together,
+        so the API reads either the old data or the complete new data.
+        """
+        start = time.time()
+        aggregates.ensure_tables()
+        if settings.TYPED_VOTES:
+            typed.ensure_table()
+
+        with io.open(options['path'], encoding='utf-8', errors='replace', newline='') as f:
+            load = scdb.Load(f)
+            with transaction.atomic():
+                counts = load.apply()
+                self.stdout.write("Loaded %s cases and %s votes in %.2fs." % (
+                    counts['cases'], counts['votes'], time.time() - start))
+
+                # is_valid, where the column exists, is computed by the database.
+                for table, count in scdb.recompute_weighted_majvotes().items():
+                    self.stdout.write("%s: weighted_majvotes set on %s rows" % (table, count))
+                terms = aggregates.rebuild()
+                self.stdout.write("Built aggregates for %s terms." % len(terms))
+                if settings.TYPED_VOTES:
+                    self.stdout.write("Converted %s typed votes." % typed.rebuild())
+
+                transaction.on_commit(
+                    lambda: signals.data_loaded.send(sender=self.__class__, terms=None))
+
+        if connection.vendor == 'postgresql':
+            tables = [models.Case, models.Vote] + list(aggregates.AGGREGATES)
+            if settings.TYPED_VOTES:
+                tables.append(models.TypedVote)
+            with connection.cursor() as cursor:
+                for model in tables:
+                    cursor.execute("ANALYZE %s" % connection.ops.quote_name(model._meta.db_table))
+        self.stdout.write("Done in %.2fs." % (time.time() - start))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from scotus import responses
+
+class Command(BaseCommand):
+    help = "Drops cached API responses by term or natural court."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--term', action='append', dest='terms',
+            help="Purge responses about this term; repeat for several.")
+        parser.add_argument(
+            '--naturalcourt', action='append', dest='naturalcourts',
+            help="Purge responses about this natural court; repeat for several.")
+
+    def handle(self, *args, **options):
+        """
+        Base command that runs when the management command is triggered.
+        Without --term or --naturalcourt, every cached response is dropped.
+        """
+        purged = responses.purge(terms=options['terms'], naturalcourts=options['naturalcourts'])
+        if purged is None:
+            self.stdout.write("Purged every cached response.")
+        else:
+            self.stdout.write("Purged cached responses about %s terms and natural courts." % purged)
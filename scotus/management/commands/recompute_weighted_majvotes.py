@@ -0,0 +1,46 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from scotus import aggregates
+from scotus import scdb
+from scotus import signals
+from scotus import typed
+
+class Command(BaseCommand):
+    help = "Recomputes weighted_majvotes on every case and vote with one UPDATE per table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--term', action='append', dest='terms',
+            help="Only recompute this term; repeat for several. Defaults to all terms.")
+
+    def handle(self, *args, **options):
+        """
+        Base command that runs when the management command is triggered.
+        The summary tables and typed votes copy weighted_majvotes, so they
+        are rebuilt in the same transaction.
+        """
+        terms = options['terms']
+        start = time.time()
+        aggregates.ensure_tables()
+        if settings.TYPED_VOTES:
+            typed.ensure_table()
+
+        with transaction.atomic():
+            changed = scdb.recompute_weighted_majvotes(terms)
+            if terms:
+                matrix = aggregates.vote_matrix(terms)
+                for term in terms:
+                    aggregates.build_term(term, matrix)
+            else:
+                aggregates.rebuild()
+            if settings.TYPED_VOTES:
+                typed.rebuild(terms)
+            transaction.on_commit(
+                lambda: signals.data_loaded.send(sender=self.__class__, terms=terms))
+        for table, count in changed.items():
+            self.stdout.write("%s: %s rows changed" % (table, count))
+        self.stdout.write("Recomputed in %.2fs." % (time.time() - start))
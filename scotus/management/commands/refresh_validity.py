@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from scotus import indexes
+from scotus import validity
+
+class Command(BaseCommand):
+    help = "Reports or adds the generated is_valid column ValidCasesManager filters on."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--create', action='store_true', dest='create', default=False,
+            help="Add the is_valid column and its indexes, replacing a plain is_valid column.")
+
+    def handle(self, *args, **options):
+        """
+        Base command that runs when the management command is triggered.
+        """
+        for table in validity.TABLES:
+            if options['create'] and validity.add_column(table):
+                self.stdout.write("Added a generated is_valid column to %s." % table)
+            self.stdout.write("%s: %s" % (table, {
+                'generated': "is_valid is generated by the database",
+                'plain': "is_valid is a plain column; run with --create to replace it",
+                None: "no is_valid column; run with --create",
+            }[validity.column_kind(table)]))
+
+        if options['create']:
+            existing = indexes.existing_indexes()
+            with connection.cursor() as cursor:
+                for index in indexes.VALIDITY_INDEXES:
+                    if index.name not in existing:
+                        cursor.execute(index.create_sql())
+                        self.stdout.write("Created %s" % index)
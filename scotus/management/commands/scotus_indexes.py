@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from scotus import indexes
+from scotus import models
+
+class Command(BaseCommand):
+    help = "Verifies, and with --create builds, the indexes the API's queries rely on."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--create', action='store_true', dest='create', default=False,
+            help="Create missing indexes and rebuild invalid ones.")
+        parser.add_argument(
+            '--report', action='store_true', dest='report', default=False,
+            help="EXPLAIN each API query and list the indexes it uses.")
+
+    def handle(self, *args, **options):
+        """
+        Base command that runs when the management command is triggered.
+        """
+        existing = indexes.existing_indexes()
+        missing = 0
+        for index in indexes.expected_indexes():
+            status = "ok"
+            if index.name not in existing:
+                status = "missing"
+            elif not existing[index.name]:
+                status = "invalid"
+
+            if status != "ok" and options['create']:
+                with connection.cursor() as cursor:
+                    if status == "invalid":
+                        cursor.execute(index.drop_sql())
+                    cursor.execute(index.create_sql())
+                status = "created"
+            if status in ("missing", "invalid"):
+                missing += 1
+            self.stdout.write("%-8s %s" % (status, index))
+
+        if options['create'] and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                for table in sorted(set(i.table for i in indexes.expected_indexes())):
+                    cursor.execute("ANALYZE %s" % connection.ops.quote_name(table))
+
+        if options['report']:
+            self.report()
+
+        if missing:
+            self.stdout.write("%s indexes missing or invalid; run with --create." % missing)
+
+    def report(self):
+        """
+        Which API query uses which index.
+        """
+        term = models.Case.objects.order_by('-term').values_list('term', flat=True).first()
+        justice = models.Justice.objects.order_by('justice').first()
+        if term is None or justice is None:
+            self.stdout.write("No data to EXPLAIN against.")
+            return
+        self.stdout.write("")
+        for label, queryset in indexes.api_queries(term, justice.justice, justice.justicename):
+            used = indexes.used_indexes(queryset)
+            self.stdout.write("%-32s %s" % (label, ", ".join(used) or "(no index)"))
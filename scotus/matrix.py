@@ -0,0 +1,310 @@
+import threading
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+
+from scotus import models
+from scotus import responses
+
+# Shared cache key of the matrix generation, bumped by invalidate().
+GENERATION_KEY = 'scotus:matrix:generation'
+
+# Stored wherever SCDB has no value, e.g., a Justice who did not sit on a case.
+MISSING = -1
+
+# Distinct (term, naturalcourt, maxvotes) agreement results kept per matrix.
+AGREEMENT_CACHE_SIZE = 512
+
+CASE_COLUMNS = (
+    ('term', np.int16),
+    ('naturalcourt', np.int16),
+    ('majvotes', np.int8),
+    ('minvotes', np.int8),
+    ('weighted_majvotes', np.int8),
+    ('decisiondirection', np.int8),
+)
+
+CELL_COLUMNS = (
+    ('vote', np.int8),
+    ('majority', np.int8),
+    ('direction', np.int8),
+)
+
+
+def to_code(value):
+    """
+    Turns an SCDB code, usually stored as a string, into an integer.
+    """
+    if value is None or value == '':
+        return MISSING
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return MISSING
+
+
+def as_codes(values):
+    """
+    Normalizes a single code or a comma-separated string / list of codes
+    into a list of integers.
+    """
+    if not isinstance(values, (list, tuple, set, frozenset)):
+        values = ("%s" % values).split(',')
+    return [to_code(v) for v in values]
+
+
+class VoteMatrix(object):
+    """
+    A cases x justices matrix of the valid SCDB votes, held in NumPy arrays.
+    Per-case codes (term, naturalcourt, majvotes, ...) live in one array per
+    column; per-vote codes (vote, majority, direction) in one 2-d array each.
+    The votes table only changes when new data is loaded, so build it once
+    per process, and again after each load, with `get_vote_matrix()`.
+    """
+    FIELDS = ('caseid', 'justice', 'justicename') +\
+        tuple(c for c, _ in CASE_COLUMNS) + tuple(c for c, _ in CELL_COLUMNS)
+
+    def __init__(self, rows):
+        """
+        `rows` is an iterable of tuples in the order of `VoteMatrix.FIELDS`.
+        """
+        self.caseids = []
+        self.justices = []
+        self.justicenames = []
+        case_index = {}
+        justice_index = {}
+        case_values = []
+        cells = []
+
+        for row in rows:
+            caseid, justice, justicename = row[:3]
+            if justice is not None:
+                justice = "%s" % justice
+            if caseid not in case_index:
+                case_index[caseid] = len(self.caseids)
+                self.caseids.append(caseid)
+                case_values.append([to_code(v) for v in row[3:3 + len(CASE_COLUMNS)]])
+            if justice not in justice_index:
+                justice_index[justice] = len(self.justices)
+                self.justices.append(justice)
+                self.justicenames.append(justicename)
+            cells.append(
+                (case_index[caseid], justice_index[justice]) +
+                tuple(to_code(v) for v in row[3 + len(CASE_COLUMNS):]))
+
+        self.case_index = case_index
+        self.justice_index = justice_index
+        self.name_index = dict((n, i) for i, n in enumerate(self.justicenames))
+
+        shape = (len(self.caseids), len(self.justices))
+        case_values = np.array(case_values, dtype=np.int32).reshape(-1, len(CASE_COLUMNS))
+        for position, (name, dtype) in enumerate(CASE_COLUMNS):
+            setattr(self, name, case_values[:, position].astype(dtype))
+
+        cells = np.array(cells, dtype=np.int32).reshape(-1, 2 + len(CELL_COLUMNS))
+        self.cast = np.zeros(shape, dtype=bool)
+        self.cast[cells[:, 0], cells[:, 1]] = True
+        for position, (name, dtype) in enumerate(CELL_COLUMNS, 2):
+            column = np.full(shape, MISSING, dtype=dtype)
+            column[cells[:, 0], cells[:, 1]] = cells[:, position]
+            setattr(self, name, column)
+
+        self.sat = self.vote != MISSING
+        self.agreement_cache = {}
+
+    @classmethod
+    def from_queryset(cls, queryset=None):
+        """
+        Builds the matrix from `Vote.valid`, or any other Vote queryset.
+        With settings.TYPED_VOTES it reads the narrower TypedVote table.
+        """
+        if queryset is None:
+            if settings.TYPED_VOTES:
+                queryset = models.TypedVote.valid.all()
+            else:
+                queryset = models.Vote.valid.all()
+        return cls(queryset.order_by().values_list(*cls.FIELDS).iterator())
+
+    def __len__(self):
+        return len(self.caseids)
+
+    def justice_position(self, justice=None, justicename=None):
+        """
+        The column of a Justice, looked up by SCDB id or justicename.
+        Returns None for a Justice with no valid votes.
+        """
+        if justice is not None:
+            return self.justice_index.get(str(justice))
+        return self.name_index.get(justicename)
+
+    def case_mask(self, term=None, naturalcourt=None, maxvotes=None, decisiondirection=None,
+                  weighted_majvotes=None):
+        """
+        A boolean array selecting the cases that match every given filter.
+        Each filter takes a single code or a list / comma-separated string.
+        """
+        mask = np.ones(len(self.caseids), dtype=bool)
+        for column, values in (
+                ('term', term),
+                ('naturalcourt', naturalcourt),
+                ('majvotes', maxvotes),
+                ('decisiondirection', decisiondirection),
+                ('weighted_majvotes', weighted_majvotes)):
+            if values is not None and values != '':
+                mask &= np.isin(getattr(self, column), as_codes(values))
+        return mask
+
+    def group_counts(self, columns, mask=None):
+        """
+        Counts cases grouped by one or more per-case columns,
+        e.g., ('term', 'weighted_majvotes'). Returns {(codes, ...): count}.
+        """
+        keys = np.stack([getattr(self, c) for c in columns], axis=1)
+        if mask is not None:
+            keys = keys[mask]
+        if not len(keys):
+            return {}
+        groups, counts = np.unique(keys, axis=0, return_counts=True)
+        return dict(
+            (tuple(g), c) for g, c in zip(groups.tolist(), counts.tolist()))
+
+    def justice_counts(self, column, codes=None, mask=None):
+        """
+        Counts, for each Justice, the votes in `mask` whose `column` code is
+        one of `codes`; with no codes, counts every vote row, like Count('pk').
+        Returns {justice: count}.
+        """
+        cells = getattr(self, column)
+        if codes is None:
+            hits = self.cast
+        else:
+            hits = np.isin(cells, as_codes(codes))
+        if mask is not None:
+            hits = hits[mask]
+        return dict(zip(self.justices, hits.sum(axis=0).tolist()))
+
+    def liberal_counts(self, term=None, naturalcourt=None):
+        """
+        Liberal and total votes for each Justice, e.g., for one term.
+        SCDB direction "2" is liberal.
+        """
+        mask = self.case_mask(term=term, naturalcourt=naturalcourt)
+        liberal = self.justice_counts('direction', codes=[2], mask=mask)
+        total = self.justice_counts('vote', mask=mask)
+        return dict(
+            (j, {"liberal": liberal[j], "total": total[j]})
+            for j in self.justices if total[j]
+        )
+
+    def liberal_pcts(self, term=None, naturalcourt=None):
+        """
+        JusticeTerm.liberal_pcts() from the matrix: liberal_counts() plus
+        each Justice's share of liberal votes.
+        """
+        payload = self.liberal_counts(term=term, naturalcourt=naturalcourt)
+        for counts in payload.values():
+            counts["pct"] = counts["liberal"] / float(counts["total"])
+        return payload
+
+    def majority_counts(self, justice, column='majvotes', **filters):
+        """
+        Majority and dissent counts for a single Justice, grouped by
+        (term, `column`), in the cases matching case_mask() `filters`.
+        SCDB majority "2" is the majority, "1" is a dissent.
+        Returns {(term, column code): {"majority": n, "dissent": n}}.
+        """
+        position = self.justice_position(justice=justice)
+        payload = {}
+        if position is None:
+            return payload
+        majority = self.majority[:, position]
+        cases = self.case_mask(**filters)
+        for side, code in (("majority", 2), ("dissent", 1)):
+            mask = cases & (majority == code)
+            for (term, value), count in self.group_counts(('term', column), mask).items():
+                counts = payload.setdefault((term, value), {"majority": 0, "dissent": 0})
+                counts[side] = count
+        return payload
+
+    def agreement(self, term=None, naturalcourt=None, maxvotes=None):
+        """
+        Pairwise agreement between every pair of Justices in one pass.
+        For cases matching the filters, returns N x N arrays, in the order of
+        self.justices, counting the cases both Justices sat on (`common`),
+        those where both voted with the majority (`agree`, SCDB votes
+        1, 3, 4, 5) and those where both dissented (`disagree`, vote 2).
+        """
+        mask = self.case_mask(term=term, naturalcourt=naturalcourt, maxvotes=maxvotes)
+        votes = self.vote[mask]
+        sat = (votes != MISSING).astype(np.int32)
+        agree = np.isin(votes, as_codes(models.AGREE_VOTES)).astype(np.int32)
+        disagree = np.isin(votes, as_codes(models.DISAGREE_VOTES)).astype(np.int32)
+        return {
+            "common": sat.T.dot(sat),
+            "agree": agree.T.dot(agree),
+            "disagree": disagree.T.dot(disagree),
+        }
+
+    def cached_agreement(self, term=None, naturalcourt=None, maxvotes=None):
+        """
+        agreement(), cached per (term, naturalcourt, maxvotes) for the life of
+        this matrix, i.e., until new data is loaded.
+        """
+        key = tuple(
+            tuple(sorted(as_codes(v))) if v else None
+            for v in (term, naturalcourt, maxvotes))
+        payload = self.agreement_cache.get(key)
+        if payload is None:
+            if len(self.agreement_cache) >= AGREEMENT_CACHE_SIZE:
+                self.agreement_cache.clear()
+            payload = self.agreement(term=term, naturalcourt=naturalcourt, maxvotes=maxvotes)
+            self.agreement_cache[key] = payload
+        return payload
+
+
+_matrix = None
+_generation = None
+_lock = threading.Lock()
+
+
+def matrix_cache():
+    """
+    The Django cache holding the matrix generation. Use a shared backend,
+    so a load in one process makes every process rebuild its matrix.
+    """
+    return caches[settings.VOTE_MATRIX_CACHE]
+
+
+def generation():
+    return responses.get_generation(matrix_cache(), GENERATION_KEY)
+
+
+def get_vote_matrix():
+    """
+    The process-wide VoteMatrix, built on first use and rebuilt whenever
+    the shared generation has moved on since it was built. That costs one
+    cache read per call, so call it once per request.
+    """
+    global _matrix, _generation
+    current = generation()
+    matrix = _matrix
+    if matrix is None or _generation != current:
+        with _lock:
+            if _matrix is None or _generation != current:
+                _matrix = VoteMatrix.from_queryset()
+                _generation = current
+            matrix = _matrix
+    return matrix
+
+
+def invalidate(**kwargs):
+    """
+    Drops this process's VoteMatrix and bumps the shared generation, so
+    every other process rebuilds its own on its next request, e.g., after
+    loading new votes. Also works as a receiver for scotus.signals.data_loaded.
+    """
+    global _matrix
+    responses.bump_generation(matrix_cache(), GENERATION_KEY)
+    with _lock:
+        _matrix = None
@@ -1,8 +1,52 @@
+from django.conf import settings
 from django.db import models
 
 from clerk import maps
 from scotus import utils
 
+# SCDB `vote` codes for a Justice voting with the majority (or concurring)
+# and for a dissent. See http://scdb.wustl.edu/documentation.php?var=vote
+AGREE_VOTES = frozenset(['1', '3', '4', '5'])
+DISAGREE_VOTES = frozenset(['2'])
+
+# Chief Justices by the first digits of SCDB natural court IDs;
+# the last two digits number the courts under each chief.
+NATURAL_COURT_CHIEFS = {
+    1: 'Jay', 2: 'Rutledge', 3: 'Ellsworth', 4: 'Marshall', 5: 'Taney',
+    6: 'Chase', 7: 'Waite', 8: 'Fuller', 9: 'White', 10: 'Taft',
+    11: 'Hughes', 12: 'Stone', 13: 'Vinson', 14: 'Warren', 15: 'Burger',
+    16: 'Rehnquist', 17: 'Roberts',
+}
+
+# Weighted majority votes for a case with fewer than nine votes, by its
+# number of minority votes; missing Justices count as the majority.
+WEIGHTED_VOTES = (9, 8, 7, 6, 0)
+
+
+def intersect_cases(case_sets):
+    """
+    Intersects a list of sets of caseids.
+    """
+    if not case_sets:
+        return set()
+    intersecting_cases = set(case_sets[0])
+    for cases in case_sets[1:]:
+        intersecting_cases &= cases
+    return intersecting_cases
+
+
+class CommonCases(set):
+    """
+    The caseids common_cases() returns, carrying the positions it fetched
+    for them, so that agree_positions() and disagree_positions() on the
+    same Justices don't fetch them again.
+    """
+    def __init__(self, caseids, justice, justices, members):
+        super(CommonCases, self).__init__(caseids)
+        self.justice = justice
+        self.justices = list(justices)
+        self.members = members
+
 
 class NaturalCourt(utils.BaseScotusModel):
     """
@@ -22,14 +66,47 @@ class NaturalCourt(utils.BaseScotusModel):
     def __unicode__(self):
         return "%s - %s" % (self.naturalcourt, self.chief)
 
+    def common_name(self):
+        """
+        The name this natural court goes by, e.g., "Vinson 1" for 1301.
+        IDs that don't follow the SCDB scheme fall back to the chief.
+        """
+        chief, number = divmod(self.naturalcourt, 100)
+        if chief in NATURAL_COURT_CHIEFS and number:
+            return "%s %s" % (NATURAL_COURT_CHIEFS[chief], number)
+        return self.chief or "%s" % self.naturalcourt
+
     def court_terms(self):
         """
         Returns a dictionary for each term in a natural court and the MQ score for that term.
         """
-        return [
-            {"term": f.term, "score": f.martin_quinn_score}\
-            for f in CourtTerm.objects.filter(naturalcourt=self.naturalcourt)
-        ]
+        return self.all_court_terms([self.naturalcourt]).get(self.naturalcourt, [])
+
+    @classmethod
+    def all_court_terms(cls, naturalcourts=None):
+        """
+        court_terms() for every natural court, or those in `naturalcourts`,
+        keyed by naturalcourt. Courts map to terms through their cases,
+        since courts has no natural court column; a term the bench changed
+        in belongs to both courts. The score is the court's median MQ score.
+        """
+        pairs = Case.objects.order_by().values_list('naturalcourt', 'term').distinct()
+        if naturalcourts is not None:
+            pairs = pairs.filter(naturalcourt__in=["%s" % n for n in naturalcourts])
+        pairs = list(pairs)
+        scores = dict(
+            CourtTerm.objects.filter(term__in=set(t for n, t in pairs)).values_list('term', 'med'))
+
+        court_terms = {}
+        for naturalcourt, term in sorted(pairs, key=lambda p: p[1]):
+            try:
+                naturalcourt = int(naturalcourt)
+            except (TypeError, ValueError):
+                continue
+            if term in scores:
+                court_terms.setdefault(naturalcourt, []).append(
+                    {"term": term, "score": scores[term]})
+        return court_terms
 
 
 class CourtTerm(utils.BaseScotusModel):
@@ -232,13 +309,12 @@ class Case(utils.BaseScotusModel):
         """
         A scale for weighting the majority votes on a case.
         """
-        weighted_votes = (9,8,7,6,0)
         if ((int(self.majvotes) + int(self.minvotes)) < 9):
             """
             We assume missing justices voted with the majority.
             4 minority votes = 0 weighted votes.
             """
-            return weighted_votes[int(self.minvotes)]
+            return WEIGHTED_VOTES[int(self.minvotes)]
         return int(self.majvotes)
 
     def set_weighted_majvotes(self):
@@ -246,12 +322,36 @@ class Case(utils.BaseScotusModel):
         Set the weighted majority votes on this model instance.
         """
         if self.decisiondirection == "1":
-            self.weighted_majvotes = self.get_weighted_majvotes
+            self.weighted_majvotes = self.get_weighted_majvotes()
         elif self.decisiondirection == "2":
-            self.weighted_majvotes = self.get_weighted_majvotes * -1
+            self.weighted_majvotes = self.get_weighted_majvotes() * -1
         elif self.decisiondirection == "3":
             self.weighted_majvotes = 0
 
+    @classmethod
+    def summaries(cls, caseids):
+        """
+        A short summary of each case in `caseids`, keyed by caseid.
+        Combined cases share a caseid, so the first docket / issue wins.
+        """
+        payload = {}
+        cases = cls.objects.filter(caseid__in=list(caseids))\
+            .order_by('caseissuesid')\
+            .values('caseid', 'casename', 'term', 'majvotes', 'minvotes')
+        for c in cases:
+            if c['caseid'] in payload:
+                continue
+            split = None
+            if c['majvotes'] and c['minvotes']:
+                split = "%s-%s" % (c['majvotes'], c['minvotes'])
+            payload[c['caseid']] = {
+                "casename": c['casename'],
+                "term": c['term'],
+                "spit": split
+            }
+        return payload
+
+
 class Justice(utils.BaseScotusModel):
     """
     Represents a single supreme court justice.
@@ -281,61 +381,100 @@ class Justice(utils.BaseScotusModel):
             return self.full_name
         return self.justicename
 
-    def common_cases(self, justices, term=None, naturalcourt=None, maxvotes=None):
+    def get_name(self):
         """
-        Cases this Justice and all Justices in the list `justices` have in common.
+        A display name for this Justice, e.g., "Antonin Scalia".
+        SCDB stores full names as "Scalia, Antonin".
         """
-        positions = Vote.objects.all()
+        if self.full_name and self.full_name != '-':
+            if ',' in self.full_name:
+                last, first = self.full_name.split(',', 1)
+                return "%s %s" % (first.strip(), last.strip())
+            return self.full_name
+        return self.justicename
+
+    def cluster_positions(self, justices, caseids=None, term=None, naturalcourt=None, maxvotes=None):
+        """
+        The positions of this Justice and all Justices in the list `justices`,
+        fetched with a single query. Returns one dictionary per member, this
+        Justice first, mapping each caseid to the set of vote codes cast in it.
+        """
+        positions = Vote.objects.filter(
+            models.Q(justice=self.justice) | models.Q(justicename__in=justices))
+        if caseids is not None:
+            positions = positions.filter(caseid__in=caseids)
         if term:
             positions = positions.filter(term=term)
         if naturalcourt:
             positions = positions.filter(naturalcourt=naturalcourt)
         if maxvotes:
-            maxvotes = maxvotes.split(',')
-            positions = positions.filter(majvotes__in=maxvotes)
-        votes = []
-        votes.append(
-            set([p['caseid'] for p in positions.filter(justice=self.justice).values('caseid')]))
-        for j in justices:
-            votes.append(
-                set([p['caseid'] for p in positions.filter(justicename=j).values('caseid')]))
-
-        intersecting_cases = votes[0]
-        for justice_case in votes[1:]:
-            list(intersecting_cases.intersection(justice_case))
-        return intersecting_cases
+            positions = positions.filter(majvotes__in=maxvotes.split(','))
+
+        members = [{} for _ in range(len(justices) + 1)]
+        slots = {}
+        for index, justicename in enumerate(justices, 1):
+            slots.setdefault(justicename, []).append(index)
+
+        for caseid, justice, justicename, vote in positions.order_by()\
+                .values_list('caseid', 'justice', 'justicename', 'vote'):
+            indexes = list(slots.get(justicename, []))
+            if justice == self.justice:
+                indexes.append(0)
+            for index in indexes:
+                members[index].setdefault(caseid, set()).add(vote)
+        return members
+
+    def voting_cluster(self, justices, term=None, naturalcourt=None, maxvotes=None):
+        """
+        Common, agreeing and disagreeing cases for this Justice and all Justices
+        in the list `justices`, computed from one pass over their positions.
+        """
+        members = self.cluster_positions(
+            justices, term=term, naturalcourt=naturalcourt, maxvotes=maxvotes)
+        common = intersect_cases([set(m) for m in members])
+        return {
+            "common": common,
+            "agree": intersect_cases(
+                [set(c for c in common if m[c] & AGREE_VOTES) for m in members]),
+            "disagree": intersect_cases(
+                [set(c for c in common if m[c] & DISAGREE_VOTES) for m in members]),
+        }
 
-    def agree_positions(self, justices, cc):
+    def common_cases(self, justices, term=None, naturalcourt=None, maxvotes=None):
         """
-        Votes where this Justice and all Justices in the list `justices` were in the majority.
+        Cases this Justice and all Justices in the list `justices` have in common.
         """
-        votes = []
-        votes.append(set([p['caseid'] for p in Vote.objects.filter(justice=self.justice, caseid__in=cc, vote__in=['1', '3', '4', '5']).values('caseid')]))
-
-        for j in justices:
-            votes.append(set([p['caseid'] for p in Vote.objects.filter(justicename=j, caseid__in=cc, vote__in=['1', '3', '4', '5']).values('caseid')]))
+        members = self.cluster_positions(
+            justices, term=term, naturalcourt=naturalcourt, maxvotes=maxvotes)
+        return CommonCases(intersect_cases([set(m) for m in members]), self.justice, justices, members)
 
-        intersecting_votes = votes[0]
-        for vote in votes[1:]:
-            intersecting_votes = intersecting_votes.intersection(vote)
+    def common_positions(self, justices, cc):
+        """
+        The positions of this Justice and all Justices in the list `justices`
+        in the cases `cc`: those common_cases() fetched along with `cc`, or,
+        for any other collection of caseids, fetched now.
+        """
+        if isinstance(cc, CommonCases) and (cc.justice, cc.justices) == (self.justice, list(justices)):
+            return [dict((c, m[c]) for c in cc if c in m) for m in cc.members]
+        return self.cluster_positions(justices, caseids=cc)
 
-        return  (len(list(intersecting_votes)), intersecting_votes)
+    def agree_positions(self, justices, cc):
+        """
+        Votes where this Justice and all Justices in the list `justices` were in the majority.
+        """
+        members = self.common_positions(justices, cc)
+        intersecting_votes = intersect_cases(
+            [set(c for c, v in m.items() if v & AGREE_VOTES) for m in members])
+        return (len(intersecting_votes), intersecting_votes)
 
     def disagree_positions(self, justices, cc):
         """
         Votes where this Justice and all Justices in the list `justices` were in the minority.
         """
-        votes = []
-        votes.append(set([p['caseid'] for p in Vote.objects.filter(justice=self.justice, caseid__in=cc, vote__in=['2']).values('caseid')]))
-
-        for j in justices:
-            votes.append(set([p['caseid'] for p in Vote.objects.filter(justicename=j, caseid__in=cc, vote__in=['2']).values('caseid')]))
-
-        intersecting_votes = votes[0]
-        for vote in votes[1:]:
-            intersecting_votes = intersecting_votes.intersection(vote)
-
-        return (len(list(intersecting_votes)), intersecting_votes)
+        members = self.common_positions(justices, cc)
+        intersecting_votes = intersect_cases(
+            [set(c for c, v in m.items() if v & DISAGREE_VOTES) for m in members])
+        return (len(intersecting_votes), intersecting_votes)
 
 
 class Vote(utils.BaseScotusModel):
@@ -422,18 +561,20 @@ class Vote(utils.BaseScotusModel):
 
     def justice_obj(self):
         """
-        Go to the database, get the Justice object.
+        Get the Justice object, from justice_cache or the database.
         """
-        if Justice.objects.filter(justice=self.justice).count() == 1:
-            return Justice.objects.get(justice=self.justice)
+        j = justice_cache.get('justice', self.justice)
+        if j:
+            return j
         return self.justice
 
     def case_obj(self):
         """
-        Go to the database, get the Case object.
+        Get the Case object, from case_cache or the database.
         """
-        if Case.objects.filter(caseid=self.caseid).count() == 1:
-            return Case.objects.get(caseid=self.caseid)
+        c = case_cache.get('caseid', self.caseid)
+        if c:
+            return c
         return self.casename
 
     def is_majority(self):
@@ -447,6 +588,44 @@ class Vote(utils.BaseScotusModel):
         return None
 
 
+class TypedVote(utils.BaseScotusModel):
+    """
+    A compact, typed copy of the columns of Vote the API aggregates over,
+    with the SCDB codes as small integers instead of strings.
+    Written by the `build_typed_votes` management command;
+    opt in with settings.TYPED_VOTES.
+    """
+    voteid = models.CharField(max_length=255, primary_key=True)
+    caseid = models.CharField(max_length=255, db_index=True)
+    justice = models.SmallIntegerField(blank=True, null=True, db_index=True)
+    justicename = models.CharField(max_length=255, blank=True, null=True)
+    term = models.SmallIntegerField(blank=True, null=True, db_index=True)
+    naturalcourt = models.SmallIntegerField(blank=True, null=True)
+    decisiontype = models.SmallIntegerField(blank=True, null=True)
+    decisiondirection = models.SmallIntegerField(blank=True, null=True)
+    majvotes = models.SmallIntegerField(blank=True, null=True)
+    minvotes = models.SmallIntegerField(blank=True, null=True)
+    weighted_majvotes = models.SmallIntegerField(blank=True, null=True)
+    vote = models.SmallIntegerField(blank=True, null=True)
+    majority = models.SmallIntegerField(blank=True, null=True)
+    direction = models.SmallIntegerField(blank=True, null=True)
+    is_valid = models.BooleanField(default=False)
+    objects = models.Manager()
+    valid = utils.CopiedValidityManager()
+
+    class Meta:
+        """
+        Django Meta class.
+        """
+        managed = False
+        db_table = 'votes_typed'
+        ordering = ['-term']
+        index_together = [('term', 'justice')]
+
+    def __unicode__(self):
+        return "%s %s" % (self.justicename, self.caseid)
+
+
 class JusticeTerm(utils.BaseScotusModel):
     term = models.CharField(max_length=255, blank=True, null=True)
     justice = models.CharField(max_length=255, blank=True, null=True)
@@ -470,19 +649,39 @@ class JusticeTerm(utils.BaseScotusModel):
     def __unicode__(self):
         return "%s (%s)" % (self.justice_obj(), self.term)
 
+    @classmethod
+    def liberal_pcts(cls, term, justices=None):
+        """
+        Returns liberal_pct() for every Justice with valid votes in a term,
+        keyed by justice, from a single conditional-count query.
+        """
+        votes = Vote.valid.filter(term=term)
+        if justices is not None:
+            votes = votes.filter(justice__in=justices)
+        counts = votes.order_by().values('justice').annotate(
+            liberal=models.Count(models.Case(models.When(direction="2", then=1))),
+            total=models.Count('pk'))
+        payload = {}
+        for c in counts:
+            payload[c['justice']] = {
+                "liberal": c['liberal'],
+                "total": c['total'],
+                "pct": c['liberal'] / float(c['total'])
+            }
+        return payload
+
     def liberal_pct(self):
         """
         Returns a dictionary of the percentage of liberal votes.
         """
-        return {"liberal": len(self.liberal_votes()), "total": len(self.votes()), "pct": len(self.liberal_votes()) / float(len(self.votes()))}
+        return self.liberal_pcts(self.term, [self.justice]).get(
+            self.justice, {"liberal": 0, "total": 0, "pct": None})
 
     def justice_obj(self):
         """
-        Returns a dictionary of the percentage of liberal votes.
+        Returns the Justice object, from justice_cache or the database.
         """
-        if Justice.objects.filter(justice=self.justice).count() == 1:
-            return Justice.objects.get(justice=self.justice)
-        return None
+        return justice_cache.get('justice', self.justice)
 
     def justice_dict(self):
         """
@@ -496,6 +695,29 @@ class JusticeTerm(utils.BaseScotusModel):
             payload['justice_data'] = j.dict()
         return payload
 
+    @classmethod
+    def justice_dicts(cls, queryset=None):
+        """
+        justice_dict() for a whole queryset at once.
+        Justice data is loaded with one query instead of two per row.
+        """
+        return list(cls.iter_justice_dicts(cls.dicts(queryset)))
+
+    @classmethod
+    def iter_justice_dicts(cls, payloads):
+        """
+        Adds justice data to dict() payloads one at a time, the way
+        justice_dict() does. Takes any iterable, e.g., iter_dicts().
+        """
+        justices = dict((j['pk'], j) for j in Justice.dicts())
+        for payload in payloads:
+            j = justices.get(payload['justice'], None)
+            payload['justice'] = int(payload['justice'])
+            payload['term'] = int(payload['term'])
+            if j:
+                payload['justice_data'] = j
+            yield payload
+
     def liberal_votes(self):
         """
         Returns all liberal votes from this term.
@@ -507,3 +729,119 @@ class JusticeTerm(utils.BaseScotusModel):
         Returns all votes from this term.
         """
         return Vote.valid.filter(justice=self.justice, term=self.term)
+
+
+# Process-local identity maps for the lookups every view and admin page makes.
+justice_cache = utils.IdentityMap(
+    Justice, ('justice', 'justicename'), settings.JUSTICE_CACHE_SIZE)
+case_cache = utils.IdentityMap(
+    Case, ('caseissuesid', 'caseid'), settings.CASE_CACHE_SIZE)
+
+
+class AggregateModel(utils.BaseScotusModel):
+    """
+    Base class for the denormalized summary tables
+    written by the `build_aggregates` management command.
+    They are read-only as far as the app is concerned.
+    """
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        raise TypeError("Aggregates are read-only; build_aggregates writes them.")
+
+    def delete(self, *args, **kwargs):
+        raise TypeError("Aggregates are read-only; build_aggregates writes them.")
+
+
+class JusticeTermVotes(AggregateModel):
+    """
+    Valid votes by one Justice in one term, counted by
+    majority size and by whether the Justice was in the majority.
+    """
+    justice = models.CharField(max_length=255, db_index=True)
+    term = models.CharField(max_length=255, db_index=True)
+    majvotes = models.CharField(max_length=255, blank=True, null=True)
+    majority = models.CharField(max_length=255, blank=True, null=True)
+    count = models.IntegerField()
+
+    class Meta:
+        """
+        Django Meta class.
+        """
+        managed = False
+        db_table = 'agg_justice_term_votes'
+        ordering = ('-term', 'justice')
+
+    def __unicode__(self):
+        return "%s (%s) %s/%s: %s" % (self.justice, self.term, self.majvotes, self.majority, self.count)
+
+
+class TermShare(AggregateModel):
+    """
+    Valid cases in one term, counted by decision direction
+    and weighted majority votes.
+    """
+    term = models.CharField(max_length=255, db_index=True)
+    decisiondirection = models.CharField(max_length=255, blank=True, null=True)
+    weighted_majvotes = models.IntegerField(blank=True, null=True)
+    count = models.IntegerField()
+
+    class Meta:
+        """
+        Django Meta class.
+        """
+        managed = False
+        db_table = 'agg_term_shares'
+        ordering = ('-term',)
+
+    def __unicode__(self):
+        return "%s %s: %s" % (self.term, self.weighted_majvotes, self.count)
+
+
+class NaturalCourtShare(AggregateModel):
+    """
+    Valid cases in one term of a natural court, counted by decision
+    direction and weighted majority votes. Sum over terms for a whole court.
+    """
+    naturalcourt = models.CharField(max_length=255, db_index=True)
+    term = models.CharField(max_length=255, db_index=True)
+    decisiondirection = models.CharField(max_length=255, blank=True, null=True)
+    weighted_majvotes = models.IntegerField(blank=True, null=True)
+    count = models.IntegerField()
+
+    class Meta:
+        """
+        Django Meta class.
+        """
+        managed = False
+        db_table = 'agg_naturalcourt_shares'
+        ordering = ('naturalcourt', 'term')
+
+    def __unicode__(self):
+        return "%s (%s) %s: %s" % (self.naturalcourt, self.term, self.weighted_majvotes, self.count)
+
+
+class JusticeAgreement(AggregateModel):
+    """
+    How often two Justices voted together in one term: cases they both
+    sat on, cases where both were in the majority (agree) and cases
+    where both dissented (disagree). Both orderings of a pair are stored.
+    """
+    term = models.CharField(max_length=255, db_index=True)
+    justice = models.CharField(max_length=255, db_index=True)
+    other_justice = models.CharField(max_length=255)
+    common = models.IntegerField()
+    agree = models.IntegerField()
+    disagree = models.IntegerField()
+
+    class Meta:
+        """
+        Django Meta class.
+        """
+        managed = False
+        db_table = 'agg_justice_agreement'
+        ordering = ('-term', 'justice', 'other_justice')
+
+    def __unicode__(self):
+        return "%s / %s (%s)" % (self.justice, self.other_justice, self.term)
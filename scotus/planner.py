@@ -0,0 +1,202 @@
+import json
+
+from django.conf import settings
+from django.db import connection
+
+from scotus import models
+from scotus import streaming
+
+# Lookups a B-tree index can answer. Anything else, e.g., icontains or
+# regex, means a sequential scan and is rejected.
+INDEXED_LOOKUPS = ('exact', 'in', 'gt', 'gte', 'lt', 'lte', 'range', 'isnull')
+
+# Query parameters that shape the response rather than filter the cases.
+CONTROL_PARAMS = ('grouper', 'order_by', 'values', 'limit', 'page', 'explain') +\
+    streaming.STREAM_PARAMS
+
+
+class QueryError(ValueError):
+    """
+    Raised for a request the planner refuses to run.
+    """
+    pass
+
+
+class QueryPlan(object):
+    """
+    A compiled, validated query for filter_and_sum_api.
+    """
+    def __init__(self, queryset, grouper, values, limit, page):
+        self.queryset = queryset
+        self.grouper = grouper
+        self.values = values
+        self.limit = limit
+        self.page = page
+        self.offset = (page - 1) * limit
+
+    def rows(self):
+        """
+        The page of rows this plan asks for.
+        """
+        return self.queryset[self.offset:self.offset + self.limit]
+
+    def fetch(self):
+        """
+        Runs the query. Returns the rows and whether there is another page,
+        which costs one extra row rather than a COUNT.
+        """
+        rows = list(self.queryset[self.offset:self.offset + self.limit + 1])
+        return rows[:self.limit], len(rows) > self.limit
+
+    def explain(self):
+        """
+        The database's plan for this query, with its estimated cost
+        and row count where the database reports them.
+        """
+        return explain(self.rows())
+
+
+class CaseQueryPlanner(object):
+    """
+    Compiles filter_and_sum_api's GET parameters into a Case query,
+    allowing only filters and orderings the database can serve from
+    an index, and capping the number of rows returned.
+    """
+    def __init__(self, queryset=None):
+        if queryset is None:
+            queryset = models.Case.valid.filter(decisiondirection__in=['2', '1'])
+        self.queryset = queryset
+        self.model = queryset.model
+
+    def field_names(self):
+        """
+        Every concrete field on the model.
+        """
+        return [f.name for f in self.model._meta.concrete_fields]
+
+    def indexed_fields(self):
+        """
+        Fields backed by an index: primary keys, db_index fields and
+        settings.FILTER_API_INDEXED_FIELDS.
+        """
+        indexed = set(settings.FILTER_API_INDEXED_FIELDS)
+        for f in self.model._meta.concrete_fields:
+            if f.primary_key or f.unique or f.db_index:
+                indexed.add(f.name)
+        return indexed
+
+    def filter_kwargs(self, key, value):
+        """
+        Validates a single filter parameter and turns it into .filter() kwargs.
+        """
+        parts = key.split('__')
+        field = parts[0]
+        lookup = 'exact'
+        if len(parts) == 2:
+            lookup = parts[1]
+        elif len(parts) > 2:
+            raise QueryError("Unsupported filter: %s" % key)
+
+        if field not in self.indexed_fields():
+            raise QueryError("Filtering on %s is not allowed; it is not indexed." % field)
+        if lookup not in INDEXED_LOOKUPS:
+            raise QueryError("The %s lookup is not allowed; it cannot use an index." % lookup)
+
+        if lookup == 'in':
+            value = value.split(',')
+            if len(value) > settings.FILTER_API_MAX_IN_VALUES:
+                raise QueryError(
+                    "At most %s values are allowed in %s." % (settings.FILTER_API_MAX_IN_VALUES, key))
+        elif lookup == 'range':
+            value = value.split(',')
+            if len(value) != 2:
+                raise QueryError("%s takes two comma-separated values." % key)
+        elif lookup == 'isnull':
+            value = value.lower() in ('1', 'true', 'yes')
+        return {key: value}
+
+    def positive_int(self, params, key, default):
+        """
+        Reads a positive integer parameter.
+        """
+        if not params.get(key, None):
+            return default
+        try:
+            value = int(params[key][-1])
+        except ValueError:
+            raise QueryError("%s must be a number." % key)
+        if value < 1:
+            raise QueryError("%s must be at least 1." % key)
+        return value
+
+    def compile(self, params):
+        """
+        Compiles `params`, a dict of lists like dict(request.GET), into a QueryPlan.
+        Raises QueryError for anything it won't run.
+        """
+        grouper = 'term'
+        order_by = ['-term']
+        values = ['caseid', 'casename', 'majvotes', 'term']
+
+        if params.get('grouper', None):
+            grouper = params['grouper'][-1]
+
+        if params.get('order_by', None):
+            order_by = params['order_by'][-1].split(',')
+
+        if params.get('values', None):
+            values = params['values'][-1].split(',')
+            if values == ['*']:
+                values = self.field_names()
+
+        unknown = [v for v in values if v not in self.field_names()]
+        if unknown:
+            raise QueryError("Unknown values: %s" % ', '.join(unknown))
+        if grouper not in values:
+            raise QueryError("The grouper %s must be one of the values." % grouper)
+        unindexed = [o for o in order_by if o.lstrip('-') not in self.indexed_fields()]
+        if unindexed:
+            raise QueryError("Ordering by %s is not allowed; it is not indexed." % ', '.join(unindexed))
+
+        limit = min(
+            self.positive_int(params, 'limit', settings.FILTER_API_MAX_ROWS),
+            settings.FILTER_API_MAX_ROWS)
+        page = self.positive_int(params, 'page', 1)
+
+        query = self.queryset
+        for k,v in params.items():
+            if k in CONTROL_PARAMS:
+                continue
+            query = query.filter(**self.filter_kwargs(k, v[-1]))
+        query = query.order_by(*order_by)
+        query = query.values(*values)
+
+        plan = QueryPlan(query, grouper, values, limit, page)
+        if settings.FILTER_API_MAX_COST:
+            cost = plan.explain()['cost']
+            if cost is not None and cost > settings.FILTER_API_MAX_COST:
+                raise QueryError(
+                    "This query is too expensive (estimated cost %s); add filters or a limit." % cost)
+        return plan
+
+
+def explain(queryset):
+    """
+    Runs EXPLAIN on a queryset. PostgreSQL reports an estimated cost and
+    row count; other databases only return their plan.
+    """
+    sql, params = queryset.query.sql_with_params()
+    payload = {"sql": sql, "params": list(params), "plan": None, "cost": None, "rows": None}
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+            if not isinstance(plan, list):
+                plan = json.loads(plan)
+            payload['plan'] = plan
+            payload['cost'] = plan[0]['Plan']['Total Cost']
+            payload['rows'] = plan[0]['Plan']['Plan Rows']
+        elif connection.vendor == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            payload['plan'] = [row[-1] for row in cursor.fetchall()]
+    return payload
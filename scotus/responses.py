@@ -0,0 +1,340 @@
+import calendar
+import datetime
+import hashlib
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import Q
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from scotus import models
+from scotus import streaming
+from scotus import utils
+
+GENERATION_KEY = 'scotus:materialized:generation'
+RESPONSE_GENERATION_KEY = 'scotus:response:generation'
+CURRENT_NATURALCOURT_KEY = 'scotus:response:current-naturalcourt'
+
+# Scope of cached responses that cover every term, dropped by any purge.
+ALL_TAG = 'all'
+
+
+def materialized_cache():
+    """
+    The Django cache holding materialized responses.
+    Use a shared backend in production so every process sees the same
+    responses and invalidations; on a process-local one they expire.
+    """
+    return caches[settings.MATERIALIZED_RESPONSE_CACHE]
+
+
+def new_generation():
+    """
+    A starting value for a generation counter. It is a timestamp rather
+    than 1, so a counter the cache evicted doesn't start over and bring
+    back entries stored under its old values.
+    """
+    return int(time.time() * 1000)
+
+
+def get_generation(cache, key):
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, new_generation(), None)
+        generation = cache.get(key)
+    return generation or 0
+
+
+def bump_generation(cache, key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, new_generation(), None)
+
+
+def shared(cache):
+    """
+    Whether other processes see this cache, and with it the invalidations
+    and purges the loaders and management commands send.
+    """
+    return not isinstance(cache, (LocMemCache, DummyCache))
+
+
+def keep_timeout(cache, timeout):
+    """
+    `timeout`, unless it is None (forever) and the cache is process-local.
+    No purge from another process reaches such a cache, so its entries
+    expire after RESPONSE_CACHE_CURRENT_TIMEOUT seconds instead.
+    """
+    if timeout is None and not shared(cache):
+        return settings.RESPONSE_CACHE_CURRENT_TIMEOUT
+    return timeout
+
+
+def generation():
+    """
+    The current generation of materialized responses.
+    Bumped by invalidate(), which orphans every stored response at once.
+    """
+    return get_generation(materialized_cache(), GENERATION_KEY)
+
+
+def invalidate(**kwargs):
+    """
+    Drops every materialized response, e.g., after the loaders import new
+    data. Also works as a receiver for scotus.signals.data_loaded.
+    """
+    bump_generation(materialized_cache(), GENERATION_KEY)
+
+
+def materialize(response):
+    """
+    Turns a rendered response into a storable entry with a content hash.
+    """
+    content = response.content
+    return {
+        "content": content,
+        "content_type": response['Content-Type'],
+        "etag": '"%s"' % hashlib.sha1(content).hexdigest(),
+        "last_modified": calendar.timegm(datetime.datetime.utcnow().utctimetuple()),
+    }
+
+
+def materialized(name):
+    """
+    Decorator for views whose output only changes when new data is loaded,
+    e.g., the Martin-Quinn score endpoints. The response is built once,
+    stored with its content hash and served with ETag / Last-Modified;
+    conditional GETs that match get a 304.
+    """
+    def decorator(view):
+        @wraps(view)
+        def inner(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or streaming.requested(request):
+                return view(request, *args, **kwargs)
+
+            cache = materialized_cache()
+            key = 'scotus:materialized:%s:%s' % (generation(), name)
+            entry = cache.get(key)
+            if entry is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200 or getattr(response, 'streaming', False):
+                    return response
+                entry = materialize(response)
+                cache.set(key, entry, keep_timeout(cache, None))
+
+            return serve(request, entry)
+        return inner
+    return decorator
+
+
+def serve(request, entry):
+    """
+    The response for a stored entry, or a 304 if the client has it already.
+    """
+    response = get_conditional_response(
+        request,
+        etag=entry['etag'],
+        last_modified=entry['last_modified'],
+    )
+    if response is None:
+        response = HttpResponse(entry['content'], content_type=entry['content_type'])
+        for header, value in entry.get('headers', ()):
+            response[header] = value
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(entry['last_modified'])
+    return response
+
+
+def response_cache():
+    """
+    The Django cache holding cached API responses. Any backend works:
+    local memory, file-based, or Redis through a third-party backend,
+    but only a shared one keeps responses until they are purged.
+    """
+    return caches[settings.RESPONSE_CACHE]
+
+
+class CacheStats(object):
+    """
+    Process-local hit / miss counters for the response cache.
+    """
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self):
+        """
+        Hit / miss counters for monitoring.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "model": "responses",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": float(self.hits) / lookups if lookups else None,
+        }
+
+
+response_stats = CacheStats()
+
+
+def current_naturalcourt():
+    """
+    The latest natural court, which is the one still gaining cases.
+    """
+    cache = response_cache()
+    naturalcourt = cache.get(CURRENT_NATURALCOURT_KEY)
+    if naturalcourt is None:
+        naturalcourt = models.NaturalCourt.objects.order_by('-naturalcourt')\
+            .values_list('naturalcourt', flat=True).first()
+        cache.set(CURRENT_NATURALCOURT_KEY, naturalcourt, settings.RESPONSE_CACHE_CURRENT_TIMEOUT)
+    return naturalcourt
+
+
+def split(value):
+    if not value:
+        return []
+    return [v for v in ("%s" % value).split(',') if v]
+
+
+def request_scope(request, kwargs):
+    """
+    The terms and natural courts a request asks about, from the URL or
+    the query string. Empty lists mean it covers all of them.
+    """
+    terms = split(kwargs.get('term', None) or request.GET.get('term', None))
+    naturalcourts = split(kwargs.get('naturalcourt', None) or request.GET.get('naturalcourt', None))
+    return terms, naturalcourts
+
+
+def scope_timeout(terms, naturalcourts):
+    """
+    How long a response about `terms` / `naturalcourts` may be cached:
+    forever if it only covers past terms or past natural courts, which
+    never change, and RESPONSE_CACHE_CURRENT_TIMEOUT otherwise.
+    """
+    if terms:
+        current = utils.current_term()
+        if all(t.isdigit() and int(t) < int(current) for t in terms):
+            return None
+    elif naturalcourts:
+        current = current_naturalcourt()
+        if current is not None and all(
+                n.isdigit() and int(n) < int(current) for n in naturalcourts):
+            return None
+    return settings.RESPONSE_CACHE_CURRENT_TIMEOUT
+
+
+def scope_tags(terms, naturalcourts):
+    """
+    The scopes a cached response is versioned by for purge(); ALL_TAG when
+    it covers every term.
+    """
+    tags = ['term:%s' % t for t in terms] + ['naturalcourt:%s' % n for n in naturalcourts]
+    return tags or [ALL_TAG]
+
+
+def version_key(tag):
+    return 'scotus:response-version:%s' % tag
+
+
+def scope_versions(tags):
+    """
+    The current version of each scope, fetched together.
+    """
+    cache = response_cache()
+    keys = [version_key(tag) for tag in tags]
+    found = cache.get_many(keys)
+    return [found.get(key) or get_generation(cache, key) for key in keys]
+
+
+def cache_key(name, request, tags):
+    """
+    The cache key of a request: the view name, the versions of the scopes
+    it covers and a hash of its path and query parameters, sorted so their
+    order doesn't matter. Bumping any of those versions orphans the key.
+    """
+    query = sorted((k, request.GET.getlist(k)) for k in request.GET)
+    digest = hashlib.sha1(("%s?%s" % (request.path, query)).encode('utf-8')).hexdigest()
+    versions = ".".join("%s" % v for v in scope_versions(tags))
+    return 'scotus:response:%s:%s:%s:%s' % (
+        get_generation(response_cache(), RESPONSE_GENERATION_KEY), name, versions, digest)
+
+
+def purge(terms=None, naturalcourts=None, **kwargs):
+    """
+    Drops the cached responses about `terms` and `naturalcourts`, along with
+    those covering every term, those about the natural courts the terms
+    belong to and those about the terms of the natural courts, by bumping
+    the version of each scope. With neither, drops every cached response.
+    Also works as a receiver for scotus.signals.data_loaded. Returns the
+    number of term and natural court scopes purged, or None for everything.
+    """
+    cache = response_cache()
+    if not terms and not naturalcourts:
+        bump_generation(cache, RESPONSE_GENERATION_KEY)
+        return None
+
+    terms = set("%s" % t for t in terms or [])
+    naturalcourts = set("%s" % n for n in naturalcourts or [])
+    pairs = models.Case.objects.filter(Q(term__in=terms) | Q(naturalcourt__in=naturalcourts))\
+        .order_by().values_list('term', 'naturalcourt').distinct()
+    for term, naturalcourt in pairs:
+        terms.add("%s" % term)
+        naturalcourts.add("%s" % naturalcourt)
+
+    tags = scope_tags(sorted(terms), sorted(naturalcourts))
+    for tag in [ALL_TAG] + tags:
+        bump_generation(cache, version_key(tag))
+    return len(tags)
+
+
+def cached(name):
+    """
+    Decorator for API views that are pure functions of their URL, query
+    parameters and the database. Responses about past terms or natural
+    courts are kept until purged, if the cache is shared; anything else
+    expires after RESPONSE_CACHE_CURRENT_TIMEOUT seconds. Served with
+    ETag / Last-Modified like materialized responses.
+    """
+    def decorator(view):
+        @wraps(view)
+        def inner(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or streaming.requested(request):
+                return view(request, *args, **kwargs)
+
+            terms, naturalcourts = request_scope(request, kwargs)
+            cache = response_cache()
+            key = cache_key(name, request, scope_tags(terms, naturalcourts))
+            entry = cache.get(key)
+            response_stats.record(entry is not None)
+            if entry is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200 or getattr(response, 'streaming', False):
+                    return response
+                entry = materialize(response)
+                entry['headers'] = [
+                    (header, value) for header, value in response.items()
+                    if header.lower() not in ('content-type', 'content-length', 'server-timing')
+                ]
+                cache.set(key, entry, keep_timeout(cache, scope_timeout(terms, naturalcourts)))
+
+            return serve(request, entry)
+        return inner
+    return decorator
@@ -0,0 +1,332 @@
+from collections import OrderedDict
+import csv
+import datetime
+import itertools
+import tempfile
+
+from django.db import connection, models as db_models
+
+from scotus import models
+
+# SCDB column names that differ from our field names once lowercased.
+HEADER_ALIASES = {
+    'daterearg': 'datereargument',
+}
+
+# Date formats SCDB has used in its CSV releases.
+DATE_FORMATS = ('%m/%d/%Y', '%Y-%m-%d')
+
+# Columns the app computes itself after a load; never read from SCDB.
+DERIVED_FIELDS = ('weighted_majvotes',)
+
+# Rows per existing-row lookup and per upsert batch.
+CHUNK_SIZE = 1000
+
+
+def normalize_header(name):
+    """
+    Turns an SCDB column name, e.g., caseIssuesId, into our field name.
+    """
+    name = name.strip().lower()
+    return HEADER_ALIASES.get(name, name)
+
+
+def read_rows(fileobj):
+    """
+    Reads the header of an SCDB CSV. Returns the field names and a
+    generator streaming the rows as dicts keyed by them; empty cells are None.
+    """
+    reader = csv.reader(fileobj)
+    header = [normalize_header(h) for h in next(reader, [])]
+    rows = (dict((k, v.strip() or None) for k, v in zip(header, row)) for row in reader)
+    return header, rows
+
+
+def parse_date(value):
+    if value is None:
+        return None
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+def model_fields(model, header):
+    """
+    The concrete fields of `model` an SCDB file with `header` fills in.
+    """
+    return [
+        f for f in model._meta.concrete_fields
+        if f.attname in header and f.attname not in DERIVED_FIELDS
+    ]
+
+
+def model_values(fields, row):
+    """
+    The values of `fields` in an SCDB row, converted to their Python types.
+    """
+    values = {}
+    for f in fields:
+        value = row.get(f.attname)
+        if isinstance(f, db_models.DateField):
+            value = parse_date(value)
+        values[f.attname] = value
+    return values
+
+
+def chunks(items, size=CHUNK_SIZE):
+    items = iter(items)
+    while True:
+        batch = list(itertools.islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+def changed_rows(model, fields, rows):
+    """
+    Diffs `rows`, a dict of values keyed by primary key, against the table.
+    Returns the rows to insert and the rows to update; unchanged rows are left out.
+    """
+    pk = model._meta.pk.attname
+    names = [f.attname for f in fields]
+    inserts = []
+    updates = []
+    for keys in chunks(rows.keys()):
+        existing = dict(
+            (r[pk], r) for r in model.objects.filter(pk__in=keys).order_by().values(*names))
+        for key in keys:
+            if key not in existing:
+                inserts.append(rows[key])
+            elif any(existing[key][n] != rows[key][n] for n in names):
+                updates.append(rows[key])
+    return inserts, updates
+
+
+def upsert(model, fields, rows):
+    """
+    Writes `rows` with INSERT ... ON CONFLICT DO UPDATE, in batches.
+    Supported by PostgreSQL 9.5+ and SQLite 3.24+.
+    """
+    qn = connection.ops.quote_name
+    pk = model._meta.pk
+    updated = [f for f in fields if not f.primary_key]
+    sql = "INSERT INTO %s (%s) VALUES (%s) ON CONFLICT (%s) DO UPDATE SET %s" % (
+        qn(model._meta.db_table),
+        ", ".join(qn(f.column) for f in fields),
+        ", ".join(["%s"] * len(fields)),
+        qn(pk.column),
+        ", ".join("%s = EXCLUDED.%s" % (qn(f.column), qn(f.column)) for f in updated))
+    with connection.cursor() as cursor:
+        for batch in chunks(rows):
+            cursor.executemany(sql, [
+                [f.get_db_prep_save(row[f.attname], connection) for f in fields]
+                for row in batch
+            ])
+
+
+def copy_rows(cursor, table, fields, rows):
+    """
+    Streams `rows` into `table` with PostgreSQL's COPY FROM STDIN,
+    spooling them through a temporary CSV file. Returns the row count.
+    """
+    count = 0
+    with tempfile.SpooledTemporaryFile(max_size=64 * 1024 * 1024, mode='w+') as f:
+        writer = csv.writer(f)
+        for row in rows:
+            writer.writerow([
+                '' if v is None else v
+                for v in (fl.get_db_prep_save(row[fl.attname], connection) for fl in fields)
+            ])
+            count += 1
+        f.seek(0)
+        cursor.copy_expert("COPY %s (%s) FROM STDIN WITH (FORMAT csv)" % (
+            connection.ops.quote_name(table),
+            ", ".join(connection.ops.quote_name(fl.column) for fl in fields)), f)
+    return count
+
+
+def insert_rows(model, rows):
+    """
+    Inserts a list of row dicts: with COPY on PostgreSQL, otherwise with
+    a batched executemany. Returns the row count.
+    """
+    if not rows:
+        return 0
+    fields = [f for f in model._meta.concrete_fields if f.attname in rows[0]]
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            return copy_rows(cursor, model._meta.db_table, fields, rows)
+        sql = "INSERT INTO %s (%s) VALUES (%s)" % (
+            qn(model._meta.db_table),
+            ", ".join(qn(f.column) for f in fields),
+            ", ".join(["%s"] * len(fields)))
+        for batch in chunks(rows):
+            cursor.executemany(sql, [
+                [f.get_db_prep_save(row[f.attname], connection) for f in fields]
+                for row in batch
+            ])
+    return len(rows)
+
+
+def weighted_majvotes_sql():
+    """
+    Case.set_weighted_majvotes as a SQL expression: weighted majority
+    votes, positive for a conservative decision, negative for a liberal
+    one and 0 for an unspecifiable one. Other rows keep their value.
+    """
+    qn = connection.ops.quote_name
+    majvotes = "CAST(NULLIF(%s, '') AS integer)" % qn('majvotes')
+    minvotes = "CAST(NULLIF(%s, '') AS integer)" % qn('minvotes')
+    weighted = "CASE WHEN %s + %s < 9 THEN CASE %s %s END ELSE %s END" % (
+        majvotes, minvotes, minvotes,
+        " ".join("WHEN %s THEN %s" % (i, w) for i, w in enumerate(models.WEIGHTED_VOTES)),
+        majvotes)
+    return "CASE %s WHEN '1' THEN %s WHEN '2' THEN -(%s) WHEN '3' THEN 0 ELSE %s END" % (
+        qn('decisiondirection'), weighted, weighted, qn('weighted_majvotes'))
+
+
+def recompute_weighted_majvotes(terms=None):
+    """
+    Recomputes weighted_majvotes on the cases and votes of `terms`, or all
+    of them, with one UPDATE per table that only touches rows whose value
+    changes. Returns the rows changed per table.
+    """
+    qn = connection.ops.quote_name
+    expression = weighted_majvotes_sql()
+    distinct = "IS DISTINCT FROM"
+    if connection.vendor == 'sqlite':
+        distinct = "IS NOT"
+    changed = OrderedDict()
+    with connection.cursor() as cursor:
+        for model in (models.Case, models.Vote):
+            sql = "UPDATE %s SET %s = %s WHERE %s %s %s" % (
+                qn(model._meta.db_table), qn('weighted_majvotes'), expression,
+                qn('weighted_majvotes'), distinct, expression)
+            params = []
+            if terms:
+                sql += " AND %s IN (%s)" % (qn('term'), ", ".join(["%s"] * len(terms)))
+                params = list(terms)
+            cursor.execute(sql, params)
+            changed[model._meta.db_table] = cursor.rowcount
+    return changed
+
+
+class Ingest(object):
+    """
+    Reconciles the cases and votes of one term with an SCDB
+    justice-centered CSV, which has one row per vote and every case
+    column on each. Only new and changed rows are written.
+    """
+    def __init__(self, term):
+        self.term = "%s" % term
+        self.case_fields = []
+        self.vote_fields = []
+        self.cases = {}
+        self.votes = {}
+        self.skipped = 0
+
+    def read(self, fileobj):
+        """
+        Collects this term's rows from `fileobj`; rows from other terms are skipped.
+        """
+        header, rows = read_rows(fileobj)
+        self.case_fields = model_fields(models.Case, header)
+        self.vote_fields = model_fields(models.Vote, header)
+        for row in rows:
+            if row.get('term') != self.term:
+                self.skipped += 1
+                continue
+            self.votes[row['voteid']] = model_values(self.vote_fields, row)
+            if row['caseissuesid'] not in self.cases:
+                self.cases[row['caseissuesid']] = model_values(self.case_fields, row)
+
+    def apply(self):
+        """
+        Upserts the new and changed cases and votes.
+        Returns {"cases": (inserted, updated), "votes": (inserted, updated)}.
+        """
+        counts = {}
+        for name, model, fields, rows in (
+                ('cases', models.Case, self.case_fields, self.cases),
+                ('votes', models.Vote, self.vote_fields, self.votes)):
+            inserts, updates = changed_rows(model, fields, rows)
+            upsert(model, fields, inserts + updates)
+            counts[name] = (len(inserts), len(updates))
+        return counts
+
+
+class Load(object):
+    """
+    A full reload of cases and votes from an SCDB justice-centered CSV.
+    Cases are derived from the same pass over the file: the first row of
+    each caseissuesid. `load_scdb` replaces everything, and recomputes what
+    is derived from it, in one transaction, so the API keeps reading the
+    old rows until the new ones are complete.
+    """
+    def __init__(self, fileobj):
+        header, self.rows = read_rows(fileobj)
+        self.case_fields = model_fields(models.Case, header)
+        self.vote_fields = model_fields(models.Vote, header)
+        self.cases = OrderedDict()
+
+    def votes(self):
+        """
+        Streams the votes, collecting the cases as a side effect.
+        """
+        for row in self.rows:
+            if row['caseissuesid'] not in self.cases:
+                self.cases[row['caseissuesid']] = model_values(self.case_fields, row)
+            yield model_values(self.vote_fields, row)
+
+    def apply(self):
+        """
+        Replaces every case and vote. Call inside transaction.atomic(), and
+        recompute the derived data in the same transaction. Returns {"cases": count, "votes": count}.
+        """
+        if connection.vendor == 'postgresql':
+            return self.apply_copy()
+        return self.apply_bulk_create()
+
+    def apply_copy(self):
+        """
+        COPYs into temporary staging tables, then swaps their rows into place.
+        """
+        qn = connection.ops.quote_name
+        counts = {}
+        with connection.cursor() as cursor:
+            # The votes go first: reading them collects the cases.
+            for name, model, fields, rows in (
+                    ('votes', models.Vote, self.vote_fields, self.votes()),
+                    ('cases', models.Case, self.case_fields, self.cases.values())):
+                cursor.execute(
+                    "CREATE TEMPORARY TABLE %s (LIKE %s INCLUDING DEFAULTS) ON COMMIT DROP" % (
+                        qn('%s_staging' % name), qn(model._meta.db_table)))
+                counts[name] = copy_rows(cursor, '%s_staging' % name, fields, rows)
+
+            for name, model, fields in (
+                    ('votes', models.Vote, self.vote_fields),
+                    ('cases', models.Case, self.case_fields)):
+                columns = ", ".join(qn(f.column) for f in fields)
+                cursor.execute("DELETE FROM %s" % qn(model._meta.db_table))
+                cursor.execute("INSERT INTO %s (%s) SELECT %s FROM %s" % (
+                    qn(model._meta.db_table), columns, columns, qn('%s_staging' % name)))
+        return counts
+
+    def apply_bulk_create(self):
+        """
+        Deletes and re-creates the rows with chunked bulk_create.
+        """
+        models.Vote.objects.all().delete()
+        models.Case.objects.all().delete()
+        counts = {"votes": 0, "cases": 0}
+        for batch in chunks(self.votes()):
+            models.Vote.objects.bulk_create([models.Vote(**v) for v in batch])
+            counts['votes'] += len(batch)
+        for batch in chunks(self.cases.values()):
+            models.Case.objects.bulk_create([models.Case(**c) for c in batch])
+            counts['cases'] += len(batch)
+        return counts
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent after new SCDB or Martin-Quinn data lands in the database.
+# `terms` is a list of the terms that changed, or None for a full load.
+data_loaded = Signal(providing_args=['terms'])
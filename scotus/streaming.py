@@ -0,0 +1,96 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+# Query parameters that control streaming rather than filter the data.
+STREAM_PARAMS = ('stream', 'format')
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+    'csv': 'text/csv',
+}
+
+
+def requested(request):
+    """
+    Whether the client opted into a streamed response with ?stream=1.
+    """
+    return request.GET.get('stream', '').lower() in ('1', 'true', 'yes')
+
+
+def stream_format(request, default='ndjson'):
+    """
+    The streamed format asked for with ?format=, one of CONTENT_TYPES.
+    """
+    requested_format = request.GET.get('format', default)
+    if requested_format in CONTENT_TYPES:
+        return requested_format
+    return default
+
+
+def dumps(row):
+    return json.dumps(row, cls=DjangoJSONEncoder)
+
+
+def ndjson_lines(rows):
+    """
+    One JSON document per line.
+    """
+    for row in rows:
+        yield dumps(row) + '\n'
+
+
+def json_array(rows):
+    """
+    A single JSON array, written out one element at a time.
+    """
+    yield '['
+    first = True
+    for row in rows:
+        if first:
+            first = False
+            yield dumps(row)
+        else:
+            yield ', ' + dumps(row)
+    yield ']'
+
+
+class Echo(object):
+    """
+    A file-like object for csv.writer that hands each line back
+    instead of buffering it.
+    """
+    def write(self, value):
+        return value
+
+
+def csv_lines(header, rows):
+    """
+    CSV lines for a header and an iterable of row tuples.
+    Dict rows are written out in header order.
+    """
+    writer = csv.writer(Echo())
+    if header:
+        yield writer.writerow(header)
+    for row in rows:
+        if isinstance(row, dict):
+            row = [row.get(key, None) for key in header]
+        yield writer.writerow(row)
+
+
+def response(rows, format='ndjson', header=None):
+    """
+    A StreamingHttpResponse for an iterable of rows.
+    Pass a queryset's .iterator() to keep memory flat; on PostgreSQL it reads
+    through a server-side cursor in chunks.
+    """
+    if format == 'csv':
+        content = csv_lines(header, rows)
+    elif format == 'json':
+        content = json_array(rows)
+    else:
+        content = ndjson_lines(rows)
+    return StreamingHttpResponse(content, content_type=CONTENT_TYPES[format])
@@ -0,0 +1,39 @@
+import os
+
+from django.test import TestCase
+
+from scotus import fixtures
+from scotus import signals
+from scotus import utils
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden')
+
+# About six cases per term, 1946-2016; the same seed always produces the same data.
+FIXTURE_SCALE = 0.05
+FIXTURE_SEED = 1946
+
+
+def golden(name):
+    """
+    The expected output stored under golden/, as bytes.
+    """
+    with open(os.path.join(GOLDEN_DIR, name), 'rb') as f:
+        return f.read()
+
+
+class FixtureTestCase(TestCase):
+    """
+    Loads a small synthetic SCDB from scotus.fixtures once per class.
+    The SCDB models are unmanaged, so the test runner doesn't create
+    their tables; fixtures.load does, inside the class's transaction.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        fixtures.load(fixtures.Generator(scale=FIXTURE_SCALE, seed=FIXTURE_SEED))
+
+    def setUp(self):
+        """
+        Drops the process-wide caches, which outlive each test's transaction.
+        """
+        utils.forget_columns()
+        signals.data_loaded.send(sender=self.__class__, terms=None)
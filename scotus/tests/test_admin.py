@@ -0,0 +1,43 @@
+from django.contrib.auth.models import User
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+
+from scotus import models
+from scotus.tests.base import FixtureTestCase
+
+
+class ChangelistTest(FixtureTestCase):
+    """
+    The Case and Vote changelists filter on fixed or small-table choices,
+    never a SELECT DISTINCT over cases or votes.
+    """
+    def setUp(self):
+        super(ChangelistTest, self).setUp()
+        user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(user)
+
+    def changelist(self, path):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        distinct = [q['sql'] for q in captured.captured_queries if 'DISTINCT' in q['sql']]
+        self.assertEqual(distinct, [])
+        return response
+
+    def test_cases(self):
+        response = self.changelist('/admin/scotus/case/')
+        self.assertContains(response, '?term=2016')
+        self.assertContains(response, 'Vinson 1')
+        response = self.changelist('/admin/scotus/case/?term=2012&decisiondirection=2')
+        self.assertEqual(
+            response.context['cl'].result_count,
+            models.Case.objects.filter(term='2012', decisiondirection='2').count())
+
+    def test_votes(self):
+        naturalcourt = models.Vote.objects.filter(justicename='AScalia')\
+            .values_list('naturalcourt', flat=True)[0]
+        response = self.changelist(
+            '/admin/scotus/vote/?justicename=AScalia&naturalcourt=%s' % naturalcourt)
+        count = models.Vote.objects.filter(justicename='AScalia', naturalcourt=naturalcourt).count()
+        self.assertTrue(count)
+        self.assertEqual(response.context['cl'].result_count, count)
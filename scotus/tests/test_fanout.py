@@ -0,0 +1,29 @@
+import threading
+
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+
+from scotus import fanout
+
+
+@override_settings(QUERY_FANOUT_WORKERS=4)
+class FanOutTest(SimpleTestCase):
+    def setUp(self):
+        self.conn_max_age = connection.settings_dict['CONN_MAX_AGE']
+
+    def tearDown(self):
+        connection.settings_dict['CONN_MAX_AGE'] = self.conn_max_age
+
+    def threads(self):
+        return fanout.fan_out(*[lambda: threading.current_thread()] * 2)
+
+    def test_persistent_connections(self):
+        connection.settings_dict['CONN_MAX_AGE'] = 600
+        self.assertNotIn(threading.current_thread(), self.threads())
+
+    def test_connection_per_request(self):
+        """
+        Under CONN_MAX_AGE = 0 every call runs on the request's connection.
+        """
+        connection.settings_dict['CONN_MAX_AGE'] = 0
+        self.assertEqual(self.threads(), [threading.current_thread()] * 2)
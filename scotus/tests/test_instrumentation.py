@@ -0,0 +1,55 @@
+import threading
+
+from django.db import connection, connections
+from django.test import SimpleTestCase
+
+from scotus import instrumentation
+
+
+class MeasurementTest(SimpleTestCase):
+    allow_database_queries = True
+
+    def run_queries(self, count, db=connection):
+        with db.cursor() as cursor:
+            for _ in range(count):
+                cursor.execute("SELECT 1")
+
+    def test_full_queries_log(self):
+        """
+        Counting doesn't read connection.queries, which stops growing once full.
+        """
+        connection.queries_log.extend([{}] * connection.queries_log.maxlen)
+        measurement = instrumentation.Measurement()
+        measurement.start()
+        try:
+            self.run_queries(3)
+        finally:
+            measurement.stop()
+        self.assertEqual(measurement.queries, 3)
+        connection.queries_log.clear()
+
+    def test_other_threads(self):
+        """
+        Queries another request's thread runs at the same time aren't counted.
+        """
+        measurement = instrumentation.Measurement()
+        measurement.start()
+        try:
+            self.run_queries(2)
+            done = []
+
+            def other_request():
+                self.run_queries(5, connections['default'])
+                connections['default'].close()
+                done.append(True)
+
+            other = threading.Thread(target=other_request)
+            other.start()
+            other.join()
+            self.run_queries(1)
+        finally:
+            measurement.stop()
+        self.assertEqual(done, [True])
+        self.assertEqual(measurement.queries, 3)
+        self.run_queries(1)
+        self.assertEqual(measurement.queries, 3)
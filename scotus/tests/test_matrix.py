@@ -0,0 +1,21 @@
+from scotus import matrix
+from scotus import models
+from scotus import responses
+from scotus.tests.base import FixtureTestCase
+
+
+class VoteMatrixTest(FixtureTestCase):
+    def test_liberal_pcts(self):
+        vote_matrix = matrix.get_vote_matrix()
+        for term in ('1946', '1980', '2016', '2030'):
+            self.assertEqual(
+                vote_matrix.liberal_pcts(term=term), models.JusticeTerm.liberal_pcts(term))
+
+    def test_generation(self):
+        """
+        Another process bumping the shared generation makes this one rebuild.
+        """
+        vote_matrix = matrix.get_vote_matrix()
+        self.assertIs(matrix.get_vote_matrix(), vote_matrix)
+        responses.bump_generation(matrix.matrix_cache(), matrix.GENERATION_KEY)
+        self.assertIsNot(matrix.get_vote_matrix(), vote_matrix)
@@ -0,0 +1,57 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from scotus import models
+from scotus import responses
+from scotus.tests.base import FixtureTestCase
+
+
+class VotingClusterTest(FixtureTestCase):
+    """
+    Voting clusters cost the same number of queries however many Justices
+    and cases they cover.
+    """
+    def setUp(self):
+        super(VotingClusterTest, self).setUp()
+        self.justice = models.justice_cache.get('justicename', 'AScalia')
+        self.others = sorted(
+            set(models.Vote.objects.filter(term='2012').values_list('justicename', flat=True))
+            - set(['AScalia']))
+
+    def scopes(self):
+        """
+        Every mix of 1, 4 or 8 other Justices with one term, one natural
+        court or every case they sat on together.
+        """
+        naturalcourt = models.Vote.objects.filter(term='2012').values_list('naturalcourt', flat=True)[0]
+        for size in (1, 4, 8):
+            for scope in ({"term": "2012"}, {"naturalcourt": naturalcourt}, {}):
+                yield self.others[:size], scope
+
+    def test_legacy_methods_share_positions(self):
+        for justices, scope in self.scopes():
+            with self.assertNumQueries(1):
+                cc = self.justice.common_cases(justices, **scope)
+                agree = self.justice.agree_positions(justices, cc)
+                disagree = self.justice.disagree_positions(justices, cc)
+            self.assertTrue(cc)
+            self.assertEqual(agree, self.justice.agree_positions(justices, set(cc)))
+            self.assertEqual(disagree, self.justice.disagree_positions(justices, set(cc)))
+
+            cluster = self.justice.voting_cluster(justices, **scope)
+            self.assertEqual(cluster['common'], cc)
+            self.assertEqual(cluster['agree'], agree[1])
+            self.assertEqual(cluster['disagree'], disagree[1])
+
+    def test_endpoint_query_count(self):
+        # The response cache looks the current natural court up once.
+        responses.current_naturalcourt()
+        counts = set()
+        for justices, scope in self.scopes():
+            query = "&".join("%s=%s" % item for item in sorted(scope.items()))
+            with CaptureQueriesContext(connection) as captured:
+                response = self.client.get('/api/v1/voting/justice/AScalia/?justices=%s&%s' % (
+                    ",".join(justices), query))
+            self.assertEqual(response.status_code, 200)
+            counts.add(len(captured))
+        self.assertEqual(len(counts), 1, counts)
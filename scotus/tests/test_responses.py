@@ -0,0 +1,75 @@
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from scotus import models
+from scotus import responses
+from scotus.tests.base import FixtureTestCase
+
+
+class PurgeTest(FixtureTestCase):
+    """
+    purge() bumps the versions of the scopes it covers, orphaning their keys.
+    """
+    def key(self, path, **kwargs):
+        request = RequestFactory().get(path, kwargs)
+        terms, naturalcourts = responses.request_scope(request, {})
+        return responses.cache_key('test', request, responses.scope_tags(terms, naturalcourts))
+
+    def test_purge_terms(self):
+        naturalcourt = models.Case.objects.filter(term='2012').values_list('naturalcourt', flat=True)[0]
+        before = [
+            self.key('/', term='2012'),
+            self.key('/', naturalcourt=naturalcourt),
+            self.key('/'),
+            self.key('/', term='1950'),
+        ]
+        responses.purge(terms=['2012'])
+        after = [
+            self.key('/', term='2012'),
+            self.key('/', naturalcourt=naturalcourt),
+            self.key('/'),
+            self.key('/', term='1950'),
+        ]
+        self.assertEqual([b == a for b, a in zip(before, after)], [False, False, False, True])
+
+    def test_purge_command(self):
+        """
+        The command counts the term and its natural courts, not the scope
+        covering every term.
+        """
+        naturalcourts = set(models.Case.objects.filter(term='2012')
+                            .values_list('naturalcourt', flat=True))
+        out = StringIO()
+        call_command('purge_responses', term=['2012'], stdout=out)
+        self.assertEqual(
+            out.getvalue().strip(),
+            "Purged cached responses about %s terms and natural courts." % (
+                1 + len(naturalcourts)))
+
+    def test_purge_everything(self):
+        before = self.key('/', term='1950')
+        responses.purge()
+        self.assertNotEqual(self.key('/', term='1950'), before)
+
+
+@override_settings(RESPONSE_CACHE_CURRENT_TIMEOUT=300)
+class KeepTimeoutTest(SimpleTestCase):
+    """
+    Only shared caches keep responses forever; purges can't reach the others.
+    """
+    def test_process_local(self):
+        cache = responses.response_cache()
+        self.assertFalse(responses.shared(cache))
+        self.assertEqual(responses.keep_timeout(cache, None), 300)
+        self.assertEqual(responses.keep_timeout(cache, 60), 60)
+
+    def test_shared(self):
+        cache = FileBasedCache('/tmp/scotus-test-cache', {})
+        self.assertTrue(responses.shared(cache))
+        self.assertEqual(responses.keep_timeout(cache, None), None)
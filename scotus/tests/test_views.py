@@ -0,0 +1,69 @@
+import json
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from scotus import models
+from scotus.tests.base import FixtureTestCase, golden
+
+
+class CasesByCourtTest(FixtureTestCase):
+    """
+    /api/v1/case/by-court/ against the CSV the original
+    per-court implementation produced from the same fixture.
+    """
+    def test_golden_csv(self):
+        response = self.client.get('/api/v1/case/by-court/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, golden('cases_by_court.csv'))
+
+    def test_common_name(self):
+        self.assertEqual(models.NaturalCourt(naturalcourt=1704).common_name(), "Roberts 4")
+        self.assertEqual(models.NaturalCourt(naturalcourt=1301).common_name(), "Vinson 1")
+        self.assertEqual(models.NaturalCourt(naturalcourt=79, chief="Stone").common_name(), "Stone")
+        self.assertEqual(models.NaturalCourt(naturalcourt=79).common_name(), "79")
+
+
+class CasesByTermTest(FixtureTestCase):
+    """
+    /api/v1/case/by-term/ against the CSV the original implementation,
+    which counted swing votes with a Vote query, produced from the same
+    fixture. The current term is pinned to the fixture's last.
+    """
+    @mock.patch('clerk.utils.current_term', return_value='2016')
+    def test_golden_csv(self, current_term):
+        response = self.client.get('/api/v1/case/by-term/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, golden('cases_by_term.csv'))
+
+
+class ScoresByNaturalCourtTest(FixtureTestCase):
+    """
+    /api/v1/score/naturalcourt/: every court's terms and median MQ scores.
+    """
+    def test_court_terms(self):
+        response = self.client.get('/api/v1/score/naturalcourt/')
+        self.assertEqual(response.status_code, 200)
+        payload = json.loads(response.content.decode('utf-8'))
+        scores = dict(models.CourtTerm.objects.values_list('term', 'med'))
+        self.assertEqual(len(payload), models.NaturalCourt.objects.count())
+        for court in payload:
+            naturalcourt = court['naturalcourt']['pk']
+            terms = sorted(set(models.Case.objects.filter(
+                naturalcourt="%s" % naturalcourt).values_list('term', flat=True)))
+            self.assertEqual([t['term'] for t in court['terms']], terms)
+            self.assertEqual([t['score'] for t in court['terms']], [scores[t] for t in terms])
+            self.assertEqual(court['terms'], models.NaturalCourt(naturalcourt=naturalcourt).court_terms())
+
+    def test_not_modified(self):
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/v1/score/naturalcourt/')
+        with self.assertNumQueries(0):
+            cached = self.client.get('/api/v1/score/naturalcourt/')
+        self.assertEqual(cached.content, response.content)
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                '/api/v1/score/naturalcourt/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
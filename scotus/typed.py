@@ -0,0 +1,57 @@
+from django.db import connection
+
+from scotus import indexes
+from scotus import models
+from scotus import utils
+
+# Columns copied from votes as they are.
+COPIED_COLUMNS = ('voteid', 'caseid', 'justicename', 'weighted_majvotes')
+
+# SCDB codes stored as strings in votes, cast to smallint.
+CODE_COLUMNS = (
+    'justice', 'term', 'naturalcourt', 'decisiontype', 'decisiondirection',
+    'majvotes', 'minvotes', 'vote', 'majority', 'direction',
+)
+
+
+def ensure_table():
+    created = utils.ensure_tables(models.TypedVote)
+    utils.forget_columns()
+    return created
+
+
+def insert_sql(terms):
+    """
+    One INSERT ... SELECT that converts every vote in `terms`, or all of them.
+    """
+    qn = connection.ops.quote_name
+    columns = COPIED_COLUMNS + CODE_COLUMNS + (utils.VALID_COLUMN,)
+    selects = [qn(c) for c in COPIED_COLUMNS]
+    selects += ["CAST(NULLIF(%s, '') AS smallint)" % qn(c) for c in CODE_COLUMNS]
+    selects.append("COALESCE(%s, false)" % indexes.VALID_PREDICATE.replace('%', '%%'))
+
+    sql = "INSERT INTO %s (%s) SELECT %s FROM %s" % (
+        qn(models.TypedVote._meta.db_table),
+        ", ".join(qn(c) for c in columns),
+        ", ".join(selects),
+        qn(models.Vote._meta.db_table))
+    params = []
+    if terms:
+        sql += " WHERE %s IN (%s)" % (qn('term'), ", ".join(["%s"] * len(terms)))
+        params = list(terms)
+    return sql, params
+
+
+def rebuild(terms=None):
+    """
+    Replaces the typed votes of `terms`, or all of them, from votes.
+    Run it inside a transaction, after ensure_table(). Returns the number
+    of votes converted.
+    """
+    existing = models.TypedVote.objects.all()
+    if terms:
+        existing = existing.filter(term__in=[int(t) for t in terms])
+    existing.delete()
+    with connection.cursor() as cursor:
+        cursor.execute(*insert_sql(terms))
+        return cursor.rowcount
@@ -1,8 +1,13 @@
+from collections import OrderedDict
 import datetime
+import decimal
+import threading
+import time
 
+from django.conf import settings
 from django.template.context_processors import csrf
-from django.core import serializers
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, connections, models
 import ftfy
 import smartypants
 import ujson as json
@@ -18,6 +23,21 @@ def current_term():
         return "%s" % now.year
 
 
+def ensure_tables(*model_classes):
+    """
+    Creates the tables for unmanaged models that don't exist yet, e.g.,
+    the summary tables this app writes itself. Returns the models created.
+    """
+    existing = connection.introspection.table_names()
+    created = []
+    with connection.schema_editor() as editor:
+        for model in model_classes:
+            if model._meta.db_table not in existing:
+                editor.create_model(model)
+                created.append(model)
+    return created
+
+
 def make_context(request):
     """
     Utility method for adding context we need to templates.
@@ -28,6 +48,202 @@ def make_context(request):
     return payload
 
 
+# Distinct strings seen by fix_text(); SCDB text repeats across rows.
+FIXED_TEXT_CACHE_SIZE = 50000
+_fixed_text = {}
+
+
+def fix_text(value):
+    """
+    ftfy.fix_text() on a stripped string, memoized per distinct value.
+    Anything that isn't a string comes back untouched.
+    """
+    try:
+        return _fixed_text[value]
+    except KeyError:
+        pass
+    except TypeError:
+        return value
+    try:
+        fixed = ftfy.fix_text(value.strip())
+    except TypeError:
+        return value
+    except UnicodeError:
+        return value
+    except AttributeError:
+        return value
+    if len(_fixed_text) >= FIXED_TEXT_CACHE_SIZE:
+        _fixed_text.clear()
+    _fixed_text[value] = fixed
+    return fixed
+
+
+def json_value(value):
+    """
+    The value a model field takes after a round trip through
+    Django's JSON serializer, e.g., dates become ISO strings.
+    """
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time, decimal.Decimal)):
+        return DjangoJSONEncoder().default(value)
+    return value
+
+
+class IdentityMap(object):
+    """
+    A process-local, size-bounded LRU cache of model instances,
+    looked up by any of a few fields, e.g., a Justice by `justice`
+    or `justicename`. Misses go to the database once; lookups that match
+    no row or several rows are cached as None too. Treat the instances
+    as read-only, since they are shared.
+    """
+    def __init__(self, model, fields, maxsize):
+        self.model = model
+        self.fields = tuple(fields)
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, field, value):
+        """
+        The single instance whose `field` equals `value`,
+        or None if there isn't exactly one.
+        """
+        if field not in self.fields:
+            raise ValueError("%s is not cached by %s." % (field, self.model.__name__))
+        key = (field, value)
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                obj = self._entries.pop(key)
+                self._entries[key] = obj
+                return obj
+            self.misses += 1
+
+        matches = list(self.model._default_manager.filter(**{field: value})[:2])
+        obj = None
+        if len(matches) == 1:
+            obj = matches[0]
+        self._store(key, obj)
+        if obj is not None and field != self.model._meta.pk.name:
+            self._store((self.model._meta.pk.name, obj.pk), obj)
+        return obj
+
+    def prime(self, queryset=None):
+        """
+        Loads the instances in `queryset`, all of them by default, with one
+        query and caches them under every field, as get() would. Returns
+        the number of instances loaded.
+        """
+        if queryset is None:
+            queryset = self.model._default_manager.all()
+        objs = list(queryset)
+        for field in self.fields:
+            matches = OrderedDict()
+            for obj in objs:
+                matches.setdefault(getattr(obj, field), []).append(obj)
+            for value, found in matches.items():
+                self._store((field, value), found[0] if len(found) == 1 else None)
+        return len(objs)
+
+    def _store(self, key, obj):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = obj
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, instance=None, **kwargs):
+        """
+        Drops everything, or only the entries for one instance. Also works
+        as a receiver for post_save / post_delete and data_loaded.
+        """
+        with self._lock:
+            if instance is None or not isinstance(instance, self.model):
+                self._entries.clear()
+                return
+            for field in self.fields:
+                self._entries.pop((field, getattr(instance, field, None)), None)
+            for key, obj in list(self._entries.items()):
+                if obj is not None and obj.pk == instance.pk:
+                    del self._entries[key]
+
+    def stats(self):
+        """
+        Hit / miss counters for monitoring.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "model": self.model.__name__,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": float(self.hits) / lookups if lookups else None,
+        }
+
+
+# The column scotus.validity adds, which the database computes from the
+# ValidCasesManager predicate.
+VALID_COLUMN = 'is_valid'
+
+_columns = {}
+_columns_lock = threading.Lock()
+
+
+def generated_columns_sql(db, table):
+    """
+    A query for the names of a table's generated columns, or None.
+    """
+    if db.vendor == 'postgresql':
+        return ("SELECT column_name FROM information_schema.columns "
+                "WHERE table_schema = current_schema() AND table_name = %s "
+                "AND is_generated = 'ALWAYS'", [table])
+    if db.vendor == 'sqlite':
+        # Hidden is 2 for a VIRTUAL and 3 for a STORED generated column.
+        return ("SELECT name FROM pragma_table_xinfo(%s) WHERE hidden IN (2, 3)", [table])
+    return None
+
+
+def describe_table(table, using='default'):
+    """
+    The column names and the generated column names of a table, looked up
+    again once they are TABLE_COLUMNS_TIMEOUT seconds old, so a running
+    process notices columns added by another one. Call forget_columns()
+    after altering the table in this process.
+    """
+    key = (using, table)
+    entry = _columns.get(key)
+    if entry is None or time.time() - entry[2] > settings.TABLE_COLUMNS_TIMEOUT:
+        db = connections[using]
+        generated = frozenset()
+        with db.cursor() as cursor:
+            columns = frozenset(
+                c.name for c in db.introspection.get_table_description(cursor, table))
+            sql = generated_columns_sql(db, table)
+            if sql is not None:
+                cursor.execute(*sql)
+                generated = frozenset(row[0] for row in cursor.fetchall())
+        entry = (columns, generated, time.time())
+        with _columns_lock:
+            _columns[key] = entry
+    return entry
+
+
+def table_columns(table, using='default'):
+    return describe_table(table, using)[0]
+
+
+def generated_columns(table, using='default'):
+    return describe_table(table, using)[1]
+
+
+def forget_columns():
+    with _columns_lock:
+        _columns.clear()
+
+
 class ValidCasesManager(models.Manager):
     """
     Removes:
@@ -41,13 +257,36 @@ class ValidCasesManager(models.Manager):
     def get_queryset(self):
         """
         Overrides the get_queryset method on this model manager.
+        Uses the is_valid column where scotus.validity has added it, since
+        the LIKE '%-01' suffix filters can't use an index. The database
+        computes the column from the same predicate, so both return the
+        same rows. A plain is_valid column left by earlier versions isn't
+        kept up to date, so it is ignored.
         """
-        return super(ValidCasesManager, self).get_queryset()\
+        queryset = super(ValidCasesManager, self).get_queryset()
+        table = self.model._meta.db_table
+        if VALID_COLUMN in generated_columns(table, self.db):
+            quote_name = connections[self.db].ops.quote_name
+            return queryset.extra(where=['%s.%s' % (quote_name(table), quote_name(VALID_COLUMN))])
+        return queryset\
             .filter(decisiontype__in=["1", "7"])\
             .filter(docketid__endswith="-01")\
             .filter(caseissuesid__endswith="-01")\
 
 
+class CopiedValidityManager(models.Manager):
+    """
+    ValidCasesManager for tables that don't carry the SCDB IDs it filters on,
+    but store its verdict in an is_valid column when their rows are
+    written, e.g., TypedVote.
+    """
+    def get_queryset(self):
+        """
+        Overrides the get_queryset method on this model manager.
+        """
+        return super(CopiedValidityManager, self).get_queryset().filter(is_valid=True)
+
+
 class BaseScotusModel(models.Model):
     """
     A base model class for our SCOTUS models to inherit.
@@ -56,25 +295,65 @@ class BaseScotusModel(models.Model):
     class Meta:
         abstract = True
 
-    def dict(self):
+    @classmethod
+    def dict_fields(cls):
         """
-        A sane method for returning a dict from a Django model.
+        The fields Django's serializer writes out under `fields`.
+        The primary key is left out; it goes under `pk`.
+        """
+        return [
+            f for f in cls._meta.concrete_model._meta.local_fields\
+            if f.serialize and f.remote_field is None
+        ]
+
+    @classmethod
+    def row_dict(cls, row):
         """
-        serialized = serializers.serialize('json', [self])
-        payload = dict(json.loads(serialized)[0]['fields'])
-        payload['pk'] = json.loads(serialized)[0]['pk']
+        Builds the dict() payload from a row of field values keyed by attname.
+        """
+        payload = {}
+        for field in cls.dict_fields():
+            payload[field.name] = json_value(row[field.attname])
+        payload['pk'] = json_value(row[cls._meta.pk.attname])
         for key,value in payload.items():
             if value:
-                try:
-                    payload[key] = ftfy.fix_text(value.strip())
-                except TypeError:
-                    pass
-                except UnicodeError:
-                    pass
-                except AttributeError:
-                    pass
+                payload[key] = fix_text(value)
         return payload
 
+    @classmethod
+    def dict_rows(cls, queryset=None):
+        """
+        A .values() queryset with every field dict() needs.
+        """
+        if queryset is None:
+            queryset = cls._default_manager.all()
+        attnames = [f.attname for f in cls.dict_fields()]
+        return queryset.values(cls._meta.pk.attname, *attnames)
+
+    @classmethod
+    def dicts(cls, queryset=None):
+        """
+        dict() for a whole queryset at once, built straight from .values() rows.
+        """
+        return [cls.row_dict(row) for row in cls.dict_rows(queryset)]
+
+    @classmethod
+    def iter_dicts(cls, queryset=None):
+        """
+        Like dicts(), but reads the rows through .iterator() and yields
+        one dict at a time, for streaming large querysets.
+        """
+        for row in cls.dict_rows(queryset).iterator():
+            yield cls.row_dict(row)
+
+    def dict(self):
+        """
+        A sane method for returning a dict from a Django model.
+        Matches what Django's JSON serializer would give us.
+        """
+        fields = self.dict_fields() + [self._meta.pk]
+        return self.row_dict(dict((f.attname, f.value_from_object(self)) for f in fields))
+
     def smart_dict(self):
         """
         A cleaner, smartypants-ified dict.
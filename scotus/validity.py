@@ -0,0 +1,53 @@
+from django.db import connection
+
+from scotus import indexes
+from scotus import utils
+
+# The tables ValidCasesManager filters.
+TABLES = ('cases', 'votes')
+
+
+def column_kind(table):
+    """
+    'generated' if the table's is_valid column is computed by the database,
+    'plain' for the ordinary column earlier versions filled with UPDATEs,
+    None if there is no is_valid column.
+    """
+    utils.forget_columns()
+    if utils.VALID_COLUMN in utils.generated_columns(table):
+        return 'generated'
+    if utils.VALID_COLUMN in utils.table_columns(table):
+        return 'plain'
+    return None
+
+
+def column_sql():
+    """
+    The is_valid column definition: the ValidCasesManager predicate,
+    computed by the database on every INSERT and UPDATE, so no loader can
+    leave it stale. PostgreSQL 12+ stores it; SQLite 3.31+ can only add
+    a VIRTUAL generated column to an existing table.
+    """
+    storage = "STORED" if connection.vendor == 'postgresql' else "VIRTUAL"
+    return "%s boolean GENERATED ALWAYS AS (COALESCE(%s, false)) %s" % (
+        connection.ops.quote_name(utils.VALID_COLUMN), indexes.VALID_PREDICATE, storage)
+
+
+def add_column(table):
+    """
+    Adds the generated is_valid column to a table, replacing a plain one
+    along with its indexes. Returns False if it was already there.
+    """
+    kind = column_kind(table)
+    if kind == 'generated':
+        return False
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        if kind == 'plain':
+            for index in indexes.VALIDITY_INDEXES:
+                if index.table == table:
+                    cursor.execute(index.drop_sql())
+            cursor.execute("ALTER TABLE %s DROP COLUMN %s" % (qn(table), qn(utils.VALID_COLUMN)))
+        cursor.execute("ALTER TABLE %s ADD COLUMN %s" % (qn(table), column_sql()))
+    utils.forget_columns()
+    return True
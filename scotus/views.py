@@ -1,20 +1,28 @@
 import csv
 import glob
-import json
 import random
 
 from bs4 import BeautifulSoup
 from django.views.generic import ListView, DetailView
 from django.shortcuts import render_to_response, redirect
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse, HttpResponseBadRequest
 from django.conf import settings
 from django.db import connection
-from django.db.models import Sum, Count
+from django.db.models import Sum, IntegerField
+from django.db.models.functions import Cast
 import ftfy
 from lxml import etree
+import numpy as np
 
 from clerk import utils as clerk_utils
+from scotus import aggregates
+from scotus import fanout
+from scotus import instrumentation
+from scotus import matrix
 from scotus import models
+from scotus import planner
+from scotus import responses
+from scotus import streaming
 from scotus import utils
 
 def case_detail(request):
@@ -66,91 +74,105 @@ def index(request):
 ### UTILITY VIEWS
 ### NO HTML PAGES
 
+@instrumentation.instrumented
+@responses.cached('justice-liberal')
 def liberal_decisions_by_justice(request, term):
     """
     For each justice, calculate the pct of liberal decisions.
     """
     params = dict(request.GET)
-    justice_terms = models.JusticeTerm.objects.filter(term=term)
+    justice_terms, justices = fanout.fan_out(
+        lambda: models.JusticeTerm.dicts(models.JusticeTerm.objects.filter(term=term)),
+        models.Justice.dicts)
+    liberalness = matrix.get_vote_matrix().liberal_pcts(term=term)
+    justices = dict((j['pk'], j) for j in justices)
     payload = [
         {
-            "justice_term": v.dict(),
-            "liberalness": v.liberal_pct(),
-            "justice": models.Justice.objects.get(justice=v.justice).dict()
+            "justice_term": v,
+            "liberalness": liberalness.get(
+                v['justice'], {"liberal": 0, "total": 0, "pct": None}),
+            "justice": justices.get(v['justice'], None)
         }\
         for v in justice_terms
     ]
-    return HttpResponse(json.dumps(payload))
+    return HttpResponse(instrumentation.dumps(payload))
 
+@instrumentation.instrumented
+@responses.materialized('score-naturalcourt')
 def scores_by_natural_court(request):
     """
     Get MQ scores by natural court.
     MQ scores are normally generated by term.
     """
+    court_terms = models.NaturalCourt.all_court_terms()
     payload = [
         {
-            "naturalcourt": n.dict(),
-            "terms": n.court_terms()
+            "naturalcourt": n,
+            "terms": court_terms.get(n['pk'], [])
         }\
-        for n in models.NaturalCourt.objects.all()
+        for n in models.NaturalCourt.dicts()
     ]
-    return HttpResponse(json.dumps(payload))
+    return HttpResponse(instrumentation.dumps(payload))
 
+@instrumentation.instrumented
+@responses.materialized('score-court')
 def court_scores_by_term(request):
     """
     Get MQ scores by term.
     """
-    payload = sorted([c.dict() for c in models.CourtTerm.objects.all()], key=lambda x: x['pk'])
-    return HttpResponse(json.dumps(payload))
+    payload = sorted(models.CourtTerm.dicts(), key=lambda x: x['pk'])
+    return HttpResponse(instrumentation.dumps(payload))
 
+@instrumentation.instrumented
+@responses.materialized('score-justice')
 def justice_scores_by_term(request):
     """
     Get MQ justice scores by term.
     """
+    if streaming.requested(request):
+        justice_terms = models.JusticeTerm.objects.order_by(
+            Cast('justice', IntegerField()), Cast('term', IntegerField()))
+        payload = models.JusticeTerm.iter_justice_dicts(
+            models.JusticeTerm.iter_dicts(justice_terms))
+        return streaming.response(payload, streaming.stream_format(request, 'json'))
+
     payload = sorted(
-        [
-            j.justice_dict()\
-            for j in models.JusticeTerm.objects.all()
-        ],
+        models.JusticeTerm.justice_dicts(),
         key=lambda x: (x['justice'], x['term'])
     )
-    return HttpResponse(json.dumps(payload))
+    return HttpResponse(instrumentation.dumps(payload))
 
+@instrumentation.instrumented
+@responses.cached('case-filter')
 def filter_and_sum_api(request):
     """
     A handy API for getting counts of cases that match a certain set of filters.
+    Filters and order_by are limited to indexed fields; see scotus.planner.
+    limit and page paginate the cases; explain=1 returns the database's plan instead.
     """
     params = dict(request.GET)
 
-    grouper = 'term'
-    order_by = '-term'
-    values = ['caseid', 'casename', 'majvotes', 'term']
-
-    if params.get('grouper', None):
-        grouper = params['grouper'][-1]
-        del params['grouper']
-
-    if params.get('order_by', None):
-        order_by = params['order_by'][-1].split(',')
-        del params['order_by']
-
-    if params.get('values', None):
-        values = params['values'][-1].split(',')
-        del params['values']
-
-    query = models.Case.valid.filter(decisiondirection__in=['2', '1'])
-    for k,v in params.items():
-        kw = {}
-        if "__in" in k:
-            kw[k] = v[-1].split(',')
-        else:
-            kw[k] = v[-1]
-        query = query.filter(**kw)
-    query = query.order_by(*order_by)
-    query = query.values(*values)
+    try:
+        plan = planner.CaseQueryPlanner().compile(params)
+    except planner.QueryError as e:
+        return HttpResponseBadRequest(
+            instrumentation.dumps({"error": "%s" % e}), content_type='application/json')
+
+    if request.GET.get('explain', None):
+        return HttpResponse(instrumentation.dumps(plan.explain()), content_type='application/json')
+
+    if streaming.requested(request):
+        """
+        Streams one case per row, in order, instead of grouping them.
+        """
+        return streaming.response(
+            plan.rows().iterator(), streaming.stream_format(request), header=plan.values)
+
+    grouper = plan.grouper
+    rows, more = plan.fetch()
 
     payload = {}
-    for case in query:
+    for case in rows:
         if not payload.get(case[grouper], None):
             payload[case[grouper]] = {}
             payload[case[grouper]]['cases'] = []
@@ -158,8 +180,13 @@ def filter_and_sum_api(request):
         payload[case[grouper]]['cases'].append(case)
         payload[case[grouper]]['total'] += 1
 
-    return HttpResponse(json.dumps(payload))
+    response = HttpResponse(instrumentation.dumps(payload))
+    if more:
+        response['X-Next-Page'] = plan.page + 1
+    return response
 
+@instrumentation.instrumented
+@responses.cached('voting-clusters')
 def voting_clusters(request, justicename):
     """
     naturalcourt is an SCDB natural court ID of a natural court, ex 1704 for Roberts 5.
@@ -168,50 +195,81 @@ def voting_clusters(request, justicename):
     term is a year representing the term, ex, 2014.
     /api/v1/voting/justice/Scalia/?term=2014&justices=Thomas,Roberts,Alito&maxvotes=5,6
     """
-    j = models.Justice.objects.get(justicename=justicename)
+    j = models.justice_cache.get('justicename', justicename)
+    if j is None:
+        raise Http404("No Justice named %s." % justicename)
     if request.GET.get('justices', None):
         justices = request.GET.get('justices', None).split(',')
-        maxvotes = request.GET.get('maxvotes', None)
-        term = request.GET.get('term', None)
-        cc = j.common_cases(
+        cluster = j.voting_cluster(
             justices,
             naturalcourt=request.GET.get('naturalcourt', None),
-            maxvotes=maxvotes,
-            term=term
+            maxvotes=request.GET.get('maxvotes', None),
+            term=request.GET.get('term', None)
         )
-        agree = j.agree_positions(justices, cc)
-        disagree = j.disagree_positions(justices, cc)
+        cc = cluster['common']
+        agree = sorted(cluster['agree'])
+        disagree = sorted(cluster['disagree'])
+        cases = models.Case.summaries(agree + disagree)
 
         payload = {}
         payload['justice'] = j.get_name()
-        payload['agree_number'] = agree[0]
-        payload['agree_cases'] = []
-        payload['disagree_number'] = disagree[0]
-        payload['disagree_cases'] = []
+        payload['agree_number'] = len(agree)
+        payload['agree_cases'] = [cases[pk] for pk in agree if pk in cases]
+        payload['disagree_number'] = len(disagree)
+        payload['disagree_cases'] = [cases[pk] for pk in disagree if pk in cases]
         payload['common_cases_number'] = len(cc)
-        payload['pct'] = float(agree[0] + disagree[0]) / len(cc)
-
-        for pk in agree[1]:
-            case_dict = {}
-            c = models.Case.objects.get(caseid=pk)
-            case_dict['casename'] = c.casename
-            case_dict['term'] = c.term
-            case_dict['spit'] = c.votes()
-            payload['agree_cases'].append(case_dict)
-
-        for pk in disagree[1]:
-            case_dict = {}
-            c = models.Case.objects.get(caseid=pk)
-            case_dict['casename'] = c.casename
-            case_dict['term'] = c.term
-            case_dict['spit'] = c.votes()
-            payload['disagree_cases'].append(case_dict)
-
-        payload = json.dumps(payload)
+        payload['pct'] = None
+        if cc:
+            payload['pct'] = float(len(agree) + len(disagree)) / len(cc)
+
+        payload = instrumentation.dumps(payload)
         return HttpResponse(payload)
 
     return HttpResponse('400 bad request')
 
+@instrumentation.instrumented
+@responses.cached('agreement')
+def agreement_matrix(request):
+    """
+    /api/v1/agreement/?term=2014
+    How often every pair of Justices voted together, as N x N matrices.
+    term, naturalcourt and maxvotes filter the cases, as in voting_clusters.
+    common: cases both Justices sat on.
+    agree: cases where both were in the majority.
+    disagree: cases where both dissented.
+    pct: (agree + disagree) / common.
+    """
+    term = request.GET.get('term', None)
+    naturalcourt = request.GET.get('naturalcourt', None)
+    maxvotes = request.GET.get('maxvotes', None)
+
+    vote_matrix = matrix.get_vote_matrix()
+    agreement = vote_matrix.cached_agreement(
+        term=term, naturalcourt=naturalcourt, maxvotes=maxvotes)
+
+    sat = [i for i in range(len(vote_matrix.justices)) if agreement['common'][i, i]]
+    common = agreement['common'][np.ix_(sat, sat)]
+    together = (agreement['agree'] + agreement['disagree'])[np.ix_(sat, sat)]
+
+    payload = {}
+    payload['term'] = term
+    payload['naturalcourt'] = naturalcourt
+    payload['maxvotes'] = maxvotes
+    payload['justices'] = [
+        {"justice": vote_matrix.justices[i], "justicename": vote_matrix.justicenames[i]}
+        for i in sat
+    ]
+    payload['common'] = common.tolist()
+    payload['agree'] = agreement['agree'][np.ix_(sat, sat)].tolist()
+    payload['disagree'] = agreement['disagree'][np.ix_(sat, sat)].tolist()
+    payload['pct'] = [
+        [float(t) / c if c else None for t, c in zip(together_row, common_row)]
+        for together_row, common_row in zip(together.tolist(), common.tolist())
+    ]
+    return HttpResponse(instrumentation.dumps(payload), content_type='application/json')
+
+@instrumentation.instrumented
+@responses.cached('case-by-term')
 def cases_by_term(request):
     """
     /api/v1/case/by-term/
@@ -220,10 +278,10 @@ def cases_by_term(request):
     term,share 9,share 8,share 7,share 6,share 5,share 0,share -5,share -6,share -7,share -8,share -9b,barwidth
     barwidth: number of terms
     term: term year
+    The swing justices broken out in the last columns come from settings.SWING_JUSTICES.
     """
     payload = []
 
-    cases = models.Case.valid.filter(decisiondirection__in=['2', '1'])
     terms = range(1946, int(clerk_utils.current_term()) + 1)
 
     SHARE_KEYS = (
@@ -239,15 +297,18 @@ def cases_by_term(request):
         "share 9"
     )
 
+    SWING_KEYS = []
+    for swing in settings.SWING_JUSTICES:
+        SWING_KEYS.append(("%s share -5" % swing['label'], swing['justicename'], -5))
+        SWING_KEYS.append(("%s share 5" % swing['label'], swing['justicename'], 5))
+
     def init_court_row():
         payload = {}
         for key in SHARE_KEYS:
             payload[key] = 0
         payload['term'] = None
-        payload['kennedy share -5'] = 0
-        payload['kennedy share 5'] = 0
-        payload['powell share -5'] = 0
-        payload['powell share 5'] = 0
+        for key, justicename, weighted_majvotes in SWING_KEYS:
+            payload[key] = 0
         return dict(payload)
 
     def compute_shares(row, case_count):
@@ -264,63 +325,68 @@ def cases_by_term(request):
         output = (row['term'],)
         for key in SHARE_KEYS:
             output = output + (row[key],)
-        output = output + (row["kennedy share -5"], row["kennedy share 5"], row["powell share -5"], row["powell share 5"])
+        for key, justicename, weighted_majvotes in SWING_KEYS:
+            output = output + (row[key],)
         return output
 
-    k = models.Justice.objects.get(justicename="AMKennedy")
-    p = models.Justice.objects.get(justicename="LFPowell")
+    def to_term(value):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    def count_swing_votes():
+        """
+        Votes by each swing justice on the winning side of a 5-4,
+        keyed by (term, justicename, weighted_majvotes).
+        """
+        vote_matrix = matrix.get_vote_matrix()
+        counts = {}
+        for swing in settings.SWING_JUSTICES:
+            j = models.justice_cache.get('justicename', swing['justicename'])
+            if not j:
+                continue
+            majority_counts = vote_matrix.majority_counts(
+                j.justice, 'weighted_majvotes', weighted_majvotes=[-5, 5], decisiondirection=[1, 2])
+            for (term, weighted_majvotes), sides in majority_counts.items():
+                if sides['majority']:
+                    counts[(term, j.justicename, weighted_majvotes)] = sides['majority']
+        return counts
+
+    """
+    One grouped count of cases by term and weighted majority, summed from
+    TermShare where build_aggregates has made it, and the swing justices'
+    votes from the vote matrix. The two are independent, so they run concurrently.
+    """
+    court_cases = aggregates.case_shares('term')
+    court_cases, swing_counts = fanout.fan_out(lambda: list(court_cases), count_swing_votes)
+
+    case_counts = {}
+    share_counts = {}
+    for c in court_cases:
+        term = to_term(c['term'])
+        case_counts[term] = case_counts.get(term, 0) + c['count']
+        if c['weighted_majvotes']:
+            key = (term, 'share %s' % c['weighted_majvotes'])
+            share_counts[key] = share_counts.get(key, 0) + c['count']
 
     for term in terms:
-        court_cases = models.Case.valid\
-            .filter(decisiondirection__in=['2', '1'])\
-            .filter(term=term)\
-            .values('casename', 'weighted_majvotes', 'term', 'decisiondirection')
         court_row = dict(init_court_row())
         court_row['term'] = term
-        for c in court_cases:
-            if c['weighted_majvotes']:
-                court_row['share %s' % c['weighted_majvotes']] += 1
-        court_row = compute_shares(court_row, court_cases.count())
-
-        """
-        Grab votes by kennedy and powell where they were on the winning side of a 5-4.
-        """
-        try:
-            court_row['powell share -5'] = float(models.Vote.valid.filter(
-                justice=p.justice,
-                term=term,
-                weighted_majvotes=-5,
-                majority="2",
-                decisiondirection__in=['2','1']).count()) / court_cases.count()
-            court_row['powell share 5'] = float(models.Vote.valid.filter(
-                justice=p.justice,
-                term=term,
-                weighted_majvotes=5,
-                majority="2",
-                decisiondirection__in=['2','1']).count()) / court_cases.count()
-        except ZeroDivisionError:
-            pass
+        for key in SHARE_KEYS:
+            court_row[key] += share_counts.get((term, key), 0)
+        case_count = case_counts.get(term, 0)
+        court_row = compute_shares(court_row, case_count)
 
-        try:
-            court_row['kennedy share -5'] = float(models.Vote.valid.filter(justice=k.justice,
-            term=term,
-            weighted_majvotes=-5,
-            majority="2",
-            decisiondirection__in=['2','1']).count()) / court_cases.count()
-            court_row['kennedy share 5'] = float(models.Vote.valid.filter(justice=k.justice,
-            term=term,
-            weighted_majvotes=5,
-            majority="2",
-            decisiondirection__in=['2','1']).count()) / court_cases.count()
-        except ZeroDivisionError:
-            pass
+        if case_count > 0:
+            for key, justicename, weighted_majvotes in SWING_KEYS:
+                court_row[key] = float(
+                    swing_counts.get((term, justicename, weighted_majvotes), 0)) / case_count
 
         payload.append(court_row)
 
     payload = sorted(payload, key=lambda x:(x['term']))
 
-    response = HttpResponse(content_type='text/csv')
-    writer = csv.writer(response)
     header = (
         "term",
         "share -9",
@@ -333,17 +399,23 @@ def cases_by_term(request):
         "share 7",
         "share 8",
         "share 9",
-        "kennedy share -5",
-        "kennedy share 5",
-        "powell share -5",
-        "powell share 5"
-    )
-    writer.writerow(header)
-    for row in payload:
-        writer.writerow(produce_row(row,header))
+    ) + tuple(key for key, justicename, weighted_majvotes in SWING_KEYS)
+
+    if streaming.requested(request):
+        return streaming.response(
+            (produce_row(row, header) for row in payload), 'csv', header=header)
+
+    response = HttpResponse(content_type='text/csv')
+    with instrumentation.phase('serialize'):
+        writer = csv.writer(response)
+        writer.writerow(header)
+        for row in payload:
+            writer.writerow(produce_row(row,header))
     return response
 
 
+@instrumentation.instrumented
+@responses.cached('case-by-court')
 def cases_by_court(request):
     """
     /api/v1/case/by-court/
@@ -355,13 +427,14 @@ def cases_by_court(request):
     """
     payload = []
 
-    cases = models.Case.valid.filter(decisiondirection__in=['2', '1'])
-
     # Limit to the Vinson 1 court, 1946 to present.
-    courts = [
-        (c.naturalcourt, c.common_name())\
-        for c in models.NaturalCourt.objects.filter(naturalcourt__gte=79)
-    ]
+    # The natural courts and the grouped count of their cases are independent,
+    # so they run concurrently.
+    court_cases = aggregates.case_shares('naturalcourt')
+    courts, court_cases = fanout.fan_out(
+        lambda: list(models.NaturalCourt.objects.filter(naturalcourt__gte=79)),
+        lambda: list(court_cases))
+    courts = [(c.naturalcourt, c.common_name()) for c in courts]
 
     SHARE_KEYS = (
         "share -10",
@@ -389,14 +462,15 @@ def cases_by_court(request):
         payload['barwidth'] = len(courts)
         return dict(payload)
 
-    def compute_shares(row, case_count):
+    def compute_shares(counts, case_counts):
         """
-        Figures out what share of cases this one represents.
+        Figures out what share of cases each count represents,
+        for every court at once.
         """
-        if case_count > 0:
-            for key in SHARE_KEYS:
-                row[key] = float(row[key]) / float(case_count)
-        return row
+        shares = counts.astype(float)
+        decided = case_counts > 0
+        shares[decided] /= case_counts[decided, np.newaxis]
+        return shares
 
     def produce_row(row, header):
         """
@@ -407,24 +481,35 @@ def cases_by_court(request):
             output = output + (row[key],)
         return output
 
-    for naturalcourt,name in courts:
-        court_cases = models.Case.valid\
-            .filter(decisiondirection__in=['2', '1'])\
-            .filter(naturalcourt=naturalcourt)\
-            .values('casename', 'weighted_majvotes', 'term', 'decisiondirection')
+    """
+    One grouped count of cases by natural court and weighted majority,
+    summed from NaturalCourtShare where build_aggregates has made it.
+    """
+    court_index = dict((naturalcourt, i) for i, (naturalcourt, name) in enumerate(courts))
+    share_index = dict((key, i) for i, key in enumerate(SHARE_KEYS))
+    counts = np.zeros((len(courts), len(SHARE_KEYS)), dtype=np.int64)
+    case_counts = np.zeros(len(courts), dtype=np.int64)
+
+    for c in court_cases:
+        try:
+            i = court_index[int(c['naturalcourt'])]
+        except (KeyError, TypeError, ValueError):
+            continue
+        case_counts[i] += c['count']
+        if c['weighted_majvotes'] and 'share %s' % c['weighted_majvotes'] in share_index:
+            counts[i, share_index['share %s' % c['weighted_majvotes']]] += c['count']
+
+    shares = compute_shares(counts, case_counts)
+    for i, (naturalcourt, name) in enumerate(courts):
         court_row = dict(init_court_row())
         court_row['term'] = name
         court_row['naturalcourt'] = naturalcourt
-        for c in court_cases:
-            if c['weighted_majvotes']:
-                court_row['share %s' % c['weighted_majvotes']] += 1
-        court_row = compute_shares(court_row, court_cases.count())
+        if case_counts[i] > 0:
+            court_row.update(zip(SHARE_KEYS, shares[i].tolist()))
         payload.append(court_row)
 
     payload = sorted(payload, key=lambda x:(x['naturalcourt']))
 
-    response = HttpResponse(content_type='text/csv')
-    writer = csv.writer(response)
     header = (
         "term",
         "share -10",
@@ -441,7 +526,29 @@ def cases_by_court(request):
         "share 10",
         "barwidth"
     )
-    writer.writerow(header)
-    for row in payload:
-        writer.writerow(produce_row(row, header))
+
+    if streaming.requested(request):
+        return streaming.response(
+            (produce_row(row, header) for row in payload), 'csv', header=header)
+
+    response = HttpResponse(content_type='text/csv')
+    with instrumentation.phase('serialize'):
+        writer = csv.writer(response)
+        writer.writerow(header)
+        for row in payload:
+            writer.writerow(produce_row(row, header))
     return response
+
+def instrumentation_stats(request):
+    """
+    /api/v1/_stats/
+    Rolling percentiles of query count, database time, serialization time
+    and total time per API URL name, over this process's last
+    INSTRUMENTATION_WINDOW requests of each, plus the identity map and
+    response cache counters.
+    """
+    payload = {}
+    payload['urls'] = instrumentation.stats.summary()
+    payload['caches'] = [
+        models.justice_cache.stats(), models.case_cache.stats(), responses.response_stats.stats()]
+    return HttpResponse(instrumentation.dumps(payload), content_type='application/json')
@@ -0,0 +1,53 @@
+import threading
+
+from django.conf import settings
+from django.db import connection, connections
+
+from scotus import fanout
+from scotus import matrix
+from scotus import models
+from scotus import utils
+
+
+def open_connections():
+    """
+    Opens a connection for every database, and one on every fan-out
+    worker, so the first requests don't pay for the handshakes.
+    Returns the number of connections opened.
+    """
+    for alias in connections:
+        connections[alias].ensure_connection()
+    opened = len(connections.all())
+
+    workers = settings.QUERY_FANOUT_WORKERS
+    if workers > 1:
+        # Every task waits for the others, so each lands on its own thread.
+        barrier = threading.Barrier(workers)
+
+        def connect():
+            try:
+                barrier.wait(timeout=10)
+            except threading.BrokenBarrierError:
+                pass
+            connection.ensure_connection()
+
+        for future in [fanout.executor().submit(connect) for _ in range(workers)]:
+            future.result()
+        opened += workers
+    return opened
+
+
+def warm_up():
+    """
+    Pre-opens connections and primes the Justice and Case identity maps
+    (cases from the last WARM_UP_CASE_TERMS terms) and the vote matrix.
+    Returns what it loaded, for logging.
+    """
+    first_term = int(utils.current_term()) - settings.WARM_UP_CASE_TERMS + 1
+    return {
+        "connections": open_connections(),
+        "justices": models.justice_cache.prime(),
+        "cases": models.case_cache.prime(
+            models.Case.objects.filter(term__gte="%s" % first_term)),
+        "matrix_cases": len(matrix.get_vote_matrix().caseids),
+    }